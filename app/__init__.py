@@ -1,13 +1,16 @@
 from flask import Flask
 from flask_cors import CORS
 import os
-from .database.db import init_db, db_session
+from .database import db as database
+from .database.db import init_db, db_session, engine
+from .database.instrumentation import init_query_instrumentation, DEFAULT_SLOW_QUERY_LOG
 from app.routes.auth_routes import auth_routes
 from app.routes.garden_routes import garden_routes
 from app.routes.entry_routes import entry_routes
 from app.routes.view_routes import view_routes
 from app.routes.dashboard_routes import dashboard_api
 from app.routes.todo_routes import todo_routes
+from app.routes.sync_routes import sync_routes
 
 
 def create_app():
@@ -27,13 +30,39 @@ def create_app():
     app.config["SECRET_KEY"] = "your_super_secret_key"
     # 📂 Upload folder configuration
     app.config['UPLOAD_FOLDER'] = upload_folder
+    # 🧩 Chunks of resumable voice uploads wait here until completed
+    app.config['RESUMABLE_UPLOAD_FOLDER'] = os.path.join(upload_folder, 'resumable')
 
-    # 📂 Initialize database
-    init_db()
+    # 🎙️ Audio storage backend: "local" (UPLOAD_FOLDER) or "s3"
+    app.config['AUDIO_STORAGE'] = os.environ.get('AUDIO_STORAGE', 'local')
+    app.config['AUDIO_S3_BUCKET'] = os.environ.get('AUDIO_S3_BUCKET')
+    app.config['AUDIO_S3_PREFIX'] = os.environ.get('AUDIO_S3_PREFIX', '')
+    app.config['AUDIO_S3_ENDPOINT_URL'] = os.environ.get('AUDIO_S3_ENDPOINT_URL')
+    app.config['AUDIO_S3_REGION'] = os.environ.get('AUDIO_S3_REGION')
+
+    # 🎚️ Decoder used to precompute voice-note waveforms
+    app.config['FFMPEG_BINARY'] = os.environ.get('FFMPEG_BINARY', 'ffmpeg')
+    # 🗜️ Optional re-encoding of uploads to a compact Opus bitrate
+    app.config['AUDIO_TRANSCODE'] = os.environ.get('AUDIO_TRANSCODE', '').lower() in ('1', 'true', 'yes')
+    app.config['AUDIO_TRANSCODE_BITRATE'] = os.environ.get('AUDIO_TRANSCODE_BITRATE', '24k')
+    app.config['AUDIO_TRANSCODE_WORKERS'] = int(os.environ.get('AUDIO_TRANSCODE_WORKERS', '2'))
+
+    # 📂 Initialize database. Serverless cold starts skip the schema checks
+    # (a dozen round trips); run setup_db.py / migrate.py on deploy instead,
+    # or set DB_INIT_ON_START to keep them.
+    if not database.serverless or database.env_flag('DB_INIT_ON_START'):
+        init_db()
 
     # 🌍 Allow frontend JS to call backend (important if frontend runs separately)
     CORS(app)
 
+    # ⏱️ Per-request query counts and timings, with N+1 warnings
+    app.config['QUERY_REPEAT_THRESHOLD'] = int(os.environ.get('QUERY_REPEAT_THRESHOLD', '10'))
+    # 🐢 Statements slower than this (ms; 0 disables) are logged with their plan
+    app.config['SLOW_QUERY_MS'] = float(os.environ.get('SLOW_QUERY_MS', '250'))
+    app.config['SLOW_QUERY_LOG'] = os.environ.get('SLOW_QUERY_LOG', DEFAULT_SLOW_QUERY_LOG)
+    init_query_instrumentation(app, engine)
+
     # 🔗 Register routes
     app.register_blueprint(auth_routes, url_prefix="/auth")
     app.register_blueprint(garden_routes, url_prefix="/garden")
@@ -41,6 +70,7 @@ def create_app():
     app.register_blueprint(view_routes)
     app.register_blueprint(dashboard_api)
     app.register_blueprint(todo_routes, url_prefix="/todos")
+    app.register_blueprint(sync_routes, url_prefix="/sync")
 
     @app.teardown_appcontext
     def shutdown_session(exception=None):
@@ -0,0 +1,3 @@
+from .waveform import compute_peaks, WAVEFORM_BUCKETS
+from .webm import WebmProbe
+from .transcode import transcode_to_opus
@@ -0,0 +1,26 @@
+import os
+import shutil
+import subprocess
+
+# Voice notes are speech: mono Opus at this bitrate is indistinguishable from
+# what MediaRecorder produces at several times the size
+DEFAULT_BITRATE = "24k"
+
+
+def transcode_to_opus(source_path, target_path, bitrate=DEFAULT_BITRATE, ffmpeg="ffmpeg"):
+    """Re-encodes a recording to mono Opus in WebM at ``bitrate``.
+
+    Runs in a worker process (see app.tasks), so it only takes and returns
+    plain values. Returns the size of ``target_path``, or None when ffmpeg
+    is missing or fails; a failed run leaves no output behind.
+    """
+    if shutil.which(ffmpeg) is None:
+        return None
+    command = [ffmpeg, "-v", "error", "-y", "-i", source_path, "-vn", "-ac", "1",
+               "-c:a", "libopus", "-b:a", bitrate, "-application", "voip", "-f", "webm", target_path]
+    result = subprocess.run(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0 or not os.path.exists(target_path):
+        if os.path.exists(target_path):
+            os.remove(target_path)
+        return None
+    return os.path.getsize(target_path)
@@ -0,0 +1,96 @@
+import shutil
+import subprocess
+import threading
+
+# Number of peak values kept per recording
+WAVEFORM_BUCKETS = 512
+
+# Decoded audio only needs to be good enough to find peaks
+DECODE_SAMPLE_RATE = 8000
+
+# Samples are reduced to per-block peaks while decoding; blocks double in
+# length whenever more than this many buckets' worth have piled up, so memory
+# stays small even for hour-long recordings
+MAX_BLOCKS_PER_BUCKET = 16
+
+CHUNK_SIZE = 64 * 1024
+
+
+def compute_peaks(source, ffmpeg="ffmpeg", buckets=WAVEFORM_BUCKETS):
+    """Decodes a recording and returns its waveform as peak amplitudes.
+
+    ``source`` is a file path or a readable binary stream. The audio is
+    decoded by ffmpeg to 8-bit mono PCM and split into ``buckets`` equal
+    slices; each output byte is the loudest sample of a slice (0-127).
+    Recordings shorter than ``buckets`` samples yield fewer values.
+
+    Returns None when ffmpeg is not installed or cannot decode the input.
+    """
+    if shutil.which(ffmpeg) is None:
+        return None
+
+    command = [ffmpeg, "-v", "error", "-i", source if isinstance(source, str) else "pipe:0",
+               "-ac", "1", "-ar", str(DECODE_SAMPLE_RATE), "-f", "s8", "pipe:1"]
+    process = subprocess.Popen(
+        command,
+        stdin=subprocess.DEVNULL if isinstance(source, str) else subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL
+    )
+    if not isinstance(source, str):
+        # Feed the input from a thread so ffmpeg's output pipe never fills up
+        feeder = threading.Thread(target=feed, args=(source, process.stdin), daemon=True)
+        feeder.start()
+    blocks = bytearray()
+    block_samples = 1
+    pending = b""
+    while True:
+        data = process.stdout.read(CHUNK_SIZE)
+        if not data:
+            break
+        data = pending + data
+        usable = len(data) - len(data) % block_samples
+        blocks += peaks_from_samples(memoryview(data[:usable]).cast("b"), usable // block_samples)
+        pending = data[usable:]
+        while len(blocks) > MAX_BLOCKS_PER_BUCKET * buckets:
+            blocks = bytearray(peaks_from_peaks(blocks, len(blocks) // 2))
+            block_samples *= 2
+    if pending:
+        blocks += peaks_from_samples(memoryview(pending).cast("b"), 1)
+    if process.wait() != 0 or not blocks:
+        return None
+    return peaks_from_peaks(blocks, buckets)
+
+
+def feed(source, pipe):
+    try:
+        while True:
+            chunk = source.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            pipe.write(chunk)
+    except (BrokenPipeError, OSError):
+        pass
+    finally:
+        try:
+            pipe.close()
+        except OSError:
+            pass
+
+
+def peaks_from_samples(samples, buckets):
+    """Reduces signed 8-bit samples to at most ``buckets`` peak bytes."""
+    count = min(buckets, len(samples))
+    peaks = bytearray(count)
+    for i in range(count):
+        piece = samples[i * len(samples) // count:(i + 1) * len(samples) // count]
+        peaks[i] = min(127, max(max(piece), -min(piece)))
+    return bytes(peaks)
+
+
+def peaks_from_peaks(peaks, buckets):
+    """Merges peak bytes down to at most ``buckets`` values."""
+    count = min(buckets, len(peaks))
+    return bytes(
+        max(peaks[i * len(peaks) // count:(i + 1) * len(peaks) // count]) for i in range(count)
+    )
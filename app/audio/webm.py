@@ -0,0 +1,254 @@
+import struct
+
+# EBML element ids used below (https://www.matroska.org/technical/elements.html)
+EBML = 0x1A45DFA3
+SEGMENT = 0x18538067
+INFO = 0x1549A966
+TIMECODE_SCALE = 0x2AD7B1
+DURATION = 0x4489
+TRACKS = 0x1654AE6B
+TRACK_ENTRY = 0xAE
+TRACK_TYPE = 0x83
+CODEC_ID = 0x86
+AUDIO = 0xE1
+SAMPLING_FREQUENCY = 0xB5
+CHANNELS = 0x9F
+CLUSTER = 0x1F43B675
+CLUSTER_TIMECODE = 0xE7
+BLOCK_GROUP = 0xA0
+BLOCK = 0xA1
+SIMPLE_BLOCK = 0xA3
+
+# Containers are entered rather than skipped, so their children get parsed
+MASTER_ELEMENTS = {EBML, SEGMENT, INFO, TRACKS, TRACK_ENTRY, AUDIO, CLUSTER, BLOCK_GROUP}
+# Small elements whose value is read; everything else is skipped unread
+VALUE_ELEMENTS = {TIMECODE_SCALE, DURATION, TRACK_TYPE, CODEC_ID, SAMPLING_FREQUENCY, CHANNELS, CLUSTER_TIMECODE}
+# Blocks only need their header: track number, relative timecode and flags
+BLOCK_ELEMENTS = {BLOCK, SIMPLE_BLOCK}
+BLOCK_HEADER_SIZE = 4
+
+# Guards against corrupt sizes making us buffer a whole file
+MAX_VALUE_SIZE = 1024
+
+AUDIO_TRACK = 2
+DEFAULT_TIMECODE_SCALE = 1000000  # nanoseconds per timecode tick
+
+
+class WebmProbe:
+    """Incremental WebM/Matroska parser that extracts audio metadata.
+
+    Feed it the file as it is read (``reader(stream)`` does this for an
+    upload stream) and call ``metadata()`` at the end. Only element headers
+    and a few small values are looked at; block payloads are skipped, so it
+    costs next to nothing on top of copying the upload.
+
+    MediaRecorder writes live WebM without a Duration in its header, so the
+    duration falls back to the timecode of the last audio block.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.skip = 0
+        self.failed = False
+        self.timecode_scale = DEFAULT_TIMECODE_SCALE
+        self.header_duration = None
+        self.cluster_timecode = 0
+        self.last_timecode = None
+        self.track = {}
+        self.audio = None
+
+    def reader(self, stream):
+        return ProbingReader(stream, self)
+
+    def feed(self, data):
+        if self.failed:
+            return
+        if self.skip:
+            skipped = min(self.skip, len(data))
+            self.skip -= skipped
+            data = data[skipped:]
+        self.buffer += data
+        try:
+            self.parse()
+        except (ValueError, struct.error):
+            self.failed = True
+            self.buffer = bytearray()
+
+    def parse(self):
+        position = 0
+        buffer = self.buffer
+        while True:
+            if self.skip:
+                skipped = min(self.skip, len(buffer) - position)
+                self.skip -= skipped
+                position += skipped
+                if self.skip:
+                    break
+
+            header = read_element_header(buffer, position)
+            if header is None:
+                break
+            element_id, size, header_size = header
+
+            if element_id in MASTER_ELEMENTS:
+                position += header_size
+                self.start_master(element_id)
+                continue
+
+            if size is None:
+                raise ValueError("Unknown size on a non-container element")
+
+            if element_id in BLOCK_ELEMENTS:
+                if len(buffer) - position < header_size + BLOCK_HEADER_SIZE:
+                    break
+                self.read_block(buffer, position + header_size)
+            elif element_id in VALUE_ELEMENTS:
+                if size > MAX_VALUE_SIZE:
+                    raise ValueError("Oversized value element")
+                if len(buffer) - position < header_size + size:
+                    break
+                self.read_value(element_id, bytes(buffer[position + header_size:position + header_size + size]))
+
+            position += header_size
+            self.skip = size
+        del self.buffer[:position]
+
+    def start_master(self, element_id):
+        if element_id == TRACK_ENTRY:
+            self.finish_track()
+
+    def finish_track(self):
+        # Keep the first audio track only
+        if self.audio is None and self.track.get("type") == AUDIO_TRACK:
+            self.audio = self.track
+        self.track = {}
+
+    def read_value(self, element_id, value):
+        if element_id == TIMECODE_SCALE:
+            self.timecode_scale = read_uint(value)
+        elif element_id == DURATION:
+            self.header_duration = read_float(value)
+        elif element_id == TRACK_TYPE:
+            self.track["type"] = read_uint(value)
+        elif element_id == CODEC_ID:
+            self.track["codec"] = value.rstrip(b"\0").decode("ascii", "replace")
+        elif element_id == SAMPLING_FREQUENCY:
+            self.track["sample_rate"] = read_float(value)
+        elif element_id == CHANNELS:
+            self.track["channels"] = read_uint(value)
+        elif element_id == CLUSTER_TIMECODE:
+            self.cluster_timecode = read_uint(value)
+
+    def read_block(self, buffer, position):
+        track_number = read_vint(buffer, position)
+        if track_number is None:
+            raise ValueError("Malformed block header")
+        _, length = track_number
+        if len(buffer) - position < length + 2:
+            return
+        (relative,) = struct.unpack_from(">h", buffer, position + length)
+        timecode = self.cluster_timecode + relative
+        if self.last_timecode is None or timecode > self.last_timecode:
+            self.last_timecode = timecode
+
+    def metadata(self):
+        """Returns ``{"duration", "codec", "sample_rate", "channels"}``.
+
+        Values that could not be determined are None; everything is None
+        when the input was not parseable WebM.
+        """
+        self.finish_track()
+        audio = self.audio or {}
+        if self.failed and not audio:
+            return {"duration": None, "codec": None, "sample_rate": None, "channels": None}
+
+        if self.header_duration:
+            duration = self.header_duration * self.timecode_scale / 1e9
+        elif self.last_timecode is not None:
+            duration = self.last_timecode * self.timecode_scale / 1e9
+        else:
+            duration = None
+
+        codec = audio.get("codec")
+        if codec and codec.startswith("A_"):
+            codec = codec[2:]
+        sample_rate = audio.get("sample_rate")
+        return {
+            "duration": round(duration, 3) if duration is not None else None,
+            "codec": codec.lower() if codec else None,
+            "sample_rate": int(sample_rate) if sample_rate else None,
+            "channels": audio.get("channels")
+        }
+
+
+class ProbingReader:
+    """Wraps a binary stream and feeds everything read through a WebmProbe."""
+
+    def __init__(self, stream, probe):
+        self.stream = stream
+        self.probe = probe
+
+    def read(self, size=-1):
+        chunk = self.stream.read(size)
+        if chunk:
+            self.probe.feed(chunk)
+        return chunk
+
+
+def read_vint(buffer, position):
+    """Reads an EBML variable-length integer; returns ``(value, length)``.
+
+    The value keeps its length marker bit cleared. Returns None if the
+    buffer ends before the integer does.
+    """
+    if position >= len(buffer):
+        return None
+    first = buffer[position]
+    if first == 0:
+        raise ValueError("Invalid variable-length integer")
+    length = 1
+    mask = 0x80
+    while not first & mask:
+        mask >>= 1
+        length += 1
+    if position + length > len(buffer):
+        return None
+    value = first & (mask - 1)
+    for byte in buffer[position + 1:position + length]:
+        value = (value << 8) | byte
+    return value, length
+
+
+def read_element_header(buffer, position):
+    """Returns ``(element_id, size, header_size)``; size is None if unknown."""
+    if position >= len(buffer):
+        return None
+    first = buffer[position]
+    if first == 0 or first & 0xF0 == 0:
+        raise ValueError("Invalid element id")
+    id_length = 1
+    while not first & (0x80 >> (id_length - 1)):
+        id_length += 1
+    if position + id_length > len(buffer):
+        return None
+    element_id = int.from_bytes(buffer[position:position + id_length], "big")
+
+    size = read_vint(buffer, position + id_length)
+    if size is None:
+        return None
+    value, size_length = size
+    if value == (1 << (7 * size_length)) - 1:
+        value = None  # all ones: unknown size (live streams)
+    return element_id, value, id_length + size_length
+
+
+def read_uint(value):
+    return int.from_bytes(value, "big")
+
+
+def read_float(value):
+    if len(value) == 4:
+        return struct.unpack(">f", value)[0]
+    if len(value) == 8:
+        return struct.unpack(">d", value)[0]
+    raise ValueError("Invalid float size")
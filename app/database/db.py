@@ -1,45 +1,189 @@
 import os
-import re
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from sqlalchemy.orm import scoped_session, sessionmaker, declarative_base
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.pool import NullPool, QueuePool, StaticPool
+from sqlalchemy.orm import Session, scoped_session, sessionmaker, declarative_base
 
 # Load environment variables from .env
 load_dotenv()
 
 # Get database URI from environment variable or use SQLite as fallback
-db_uri = os.environ.get('DATABASE_URL', 'sqlite:////tmp/serenote.db')
-
-# If DATABASE_URL is set but connection fails, fall back to SQLite
-try:
-    # Try to create engine with the URI
-    if db_uri.startswith('sqlite'):
-        from sqlalchemy.pool import StaticPool
-        engine = create_engine(db_uri, echo=False, poolclass=StaticPool, pool_pre_ping=True)
-    else:
-        engine = create_engine(db_uri, echo=False, pool_pre_ping=True)
-    # Test the connection
-    with engine.connect() as conn:
-        pass
-except Exception:
-    print("Failed to connect to database, falling back to SQLite")
-    db_uri = 'sqlite:////tmp/serenote.db'
-    from sqlalchemy.pool import StaticPool
-    engine = create_engine(db_uri, echo=False, poolclass=StaticPool, pool_pre_ping=True)
-
-# Create engine based on database type
-if db_uri.startswith('sqlite'):
-    from sqlalchemy.pool import StaticPool
-    engine = create_engine(db_uri, echo=False, poolclass=StaticPool, pool_pre_ping=True)
-else:
-    # For PostgreSQL and other databases
-    engine = create_engine(db_uri, echo=False, pool_pre_ping=True)
-
-db_session = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+DEFAULT_DATABASE_URL = 'sqlite:////tmp/serenote.db'
+db_uri = os.environ.get('DATABASE_URL', DEFAULT_DATABASE_URL)
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def env_flag(name, default=False):
+    value = os.environ.get(name)
+    return default if value is None else value.lower() in ('1', 'true', 'yes')
+
+
+def serverless_mode():
+    """True for serverless deploys (DB_SERVERLESS, on by default on Vercel).
+
+    Each instance serves one request at a time and may be frozen between
+    invocations, in front of a transaction-mode pooler (PgBouncer /
+    Supavisor on port 6543) that owns the real server connections.
+    """
+    return env_flag('DB_SERVERLESS', bool(os.environ.get('VERCEL')))
+
+
+def engine_settings(serverless=False):
+    """Reads engine tuning from the environment (all optional).
+
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT (seconds to wait for a
+    free connection) and DB_POOL_RECYCLE (seconds before a connection is
+    replaced, so server-side idle timeouts never hit a pooled one) size the
+    pool; a pool size of 0 opens a fresh connection per checkout. Serverless
+    mode defaults to one warm connection without pre-ping, relying on
+    retry-on-disconnect instead. SQLITE_BUSY_TIMEOUT_MS and SQLITE_MMAP_SIZE
+    tune SQLite.
+    """
+    return {
+        "echo": env_flag('DB_ECHO'),
+        "serverless": serverless,
+        "pool_size": env_int('DB_POOL_SIZE', 1 if serverless else 5),
+        "max_overflow": env_int('DB_MAX_OVERFLOW', 2 if serverless else 10),
+        "pool_timeout": env_int('DB_POOL_TIMEOUT', 30),
+        "pool_recycle": env_int('DB_POOL_RECYCLE', 300 if serverless else 1800),
+        "pool_pre_ping": env_flag('DB_POOL_PRE_PING', not serverless),
+        "sqlite_busy_timeout_ms": env_int('SQLITE_BUSY_TIMEOUT_MS', 5000),
+        "sqlite_mmap_size": env_int('SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+    }
+
+
+def build_engine(url, settings):
+    """Creates the engine for ``url``; no connection is opened until first use."""
+    if url.startswith('sqlite'):
+        return build_sqlite_engine(url, settings)
+
+    connect_args = {}
+    if settings["serverless"] and url.startswith('postgresql+psycopg:'):
+        # A transaction-mode pooler hands each transaction to any server
+        # connection, where psycopg 3's prepared statements don't exist.
+        # psycopg2 never prepares server-side, so it needs nothing here.
+        connect_args["prepare_threshold"] = None
+
+    if settings["pool_size"] == 0:
+        return create_engine(
+            url, echo=settings["echo"], poolclass=NullPool,
+            pool_pre_ping=settings["pool_pre_ping"], connect_args=connect_args
+        )
+    return create_engine(
+        url,
+        echo=settings["echo"],
+        pool_size=settings["pool_size"],
+        max_overflow=settings["max_overflow"],
+        pool_timeout=settings["pool_timeout"],
+        pool_recycle=settings["pool_recycle"],
+        pool_pre_ping=settings["pool_pre_ping"],
+        connect_args=connect_args,
+    )
+
+
+def build_sqlite_engine(url, settings):
+    if ':memory:' in url or url in ('sqlite://', 'sqlite:///'):
+        # An in-memory database only exists inside its one connection
+        return create_engine(
+            url, echo=settings["echo"], poolclass=StaticPool,
+            connect_args={"check_same_thread": False}
+        )
+
+    # File databases get a connection per thread from a regular pool, so
+    # concurrent requests don't queue on one handle
+    engine = create_engine(
+        url,
+        echo=settings["echo"],
+        poolclass=QueuePool,
+        pool_size=settings["pool_size"],
+        max_overflow=settings["max_overflow"],
+        pool_timeout=settings["pool_timeout"],
+        connect_args={"check_same_thread": False, "timeout": settings["sqlite_busy_timeout_ms"] / 1000},
+    )
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # WAL lets readers run alongside a writer; NORMAL is durable in WAL mode
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={settings['sqlite_busy_timeout_ms']}")
+        cursor.execute(f"PRAGMA mmap_size={settings['sqlite_mmap_size']}")
+        cursor.close()
+
+    return engine
+
+
+# SQLite is always local to the instance, so serverless tuning doesn't apply
+serverless = serverless_mode() and not db_uri.startswith('sqlite')
+engine = build_engine(db_uri, engine_settings(serverless))
+
+# Opt-in for local development: check the database now and fall back to a
+# throwaway SQLite file if it is unreachable. Off by default, since it costs
+# a round trip at import time and would silently send production writes to
+# an ephemeral file.
+if env_flag('DATABASE_FALLBACK_SQLITE') and not db_uri.startswith('sqlite'):
+    try:
+        with engine.connect():
+            pass
+    except Exception:
+        print("Failed to connect to database, falling back to SQLite")
+        engine.dispose()
+        db_uri = DEFAULT_DATABASE_URL
+        serverless = False
+        engine = build_engine(db_uri, engine_settings())
+
+
+
+class RetryingSession(Session):
+    """Re-runs a transaction's first statement once if the connection was dead.
+
+    Replaces pre-ping: instead of a ``SELECT 1`` before every checkout, a
+    pooled connection that went stale (e.g. while a serverless instance was
+    frozen) fails its first statement, SQLAlchemy invalidates the pool and
+    the statement is retried on a fresh connection. Only a transaction's
+    first statement is retried, since nothing before it can be lost. Writes
+    issued by a flush are not retried; they fail once and the next request
+    gets a fresh connection.
+    """
+
+    def execute(self, *args, **kwargs):
+        first_statement = not self.in_transaction()
+        try:
+            return super().execute(*args, **kwargs)
+        except DBAPIError as e:
+            if not (first_statement and e.connection_invalidated):
+                raise
+            self.rollback()
+            return super().execute(*args, **kwargs)
+
+
+db_session = scoped_session(sessionmaker(
+    class_=RetryingSession, autocommit=False, autoflush=False, bind=engine
+))
 
 Base = declarative_base()
 Base.query = db_session.query_property()
 
-def init_db():
+def init_db(warn_pending=True):
+    """Creates missing tables and checks for pending migrations.
+
+    A brand-new database gets the full schema from the models, so every
+    migration is recorded as applied. Existing databases only get new
+    tables here; column and index changes come from ``python migrate.py``.
+    """
     import app.database.models
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    from app.database import migrations
+    fresh = not inspect(engine).has_table("users")
+    Base.metadata.create_all(bind=engine)
+    if fresh:
+        migrations.stamp(engine)
+        return
+    pending = migrations.pending_migrations(engine) if warn_pending else []
+    if pending:
+        names = ", ".join(f"{version:04d}_{name}" for version, name in pending)
+        print(f"Database has pending migrations ({names}); run: python migrate.py")
\ No newline at end of file
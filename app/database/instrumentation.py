@@ -0,0 +1,195 @@
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+# An endpoint running one SQL shape more often than this is probably
+# querying in a loop (N+1)
+DEFAULT_REPEAT_THRESHOLD = 10
+
+# Expanded IN lists ("?, ?, ?" / "%(id_1)s, %(id_2)s") and literals vary
+# between otherwise identical statements
+PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+))*\s*\)")
+NUMBER = re.compile(r"\b\d+\b")
+WHITESPACE = re.compile(r"\s+")
+
+# Statements that EXPLAIN accepts without running them
+EXPLAINABLE = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+
+# Slow statements are logged here; see init_query_instrumentation
+slow_query_log = None
+
+# Where SLOW_QUERY_LOG points unless configured (/tmp is not everywhere)
+DEFAULT_SLOW_QUERY_LOG = os.path.join(tempfile.gettempdir(), "serenote-slow-queries.log")
+
+
+class RepeatedQueryError(AssertionError):
+    """Raised in test mode when an endpoint repeats a query too often."""
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+
+def sql_shape(statement):
+    """Returns ``statement`` with parameter lists and literals folded away."""
+    shape = PLACEHOLDER_LIST.sub("(?)", statement)
+    shape = NUMBER.sub("N", shape)
+    return WHITESPACE.sub(" ", shape).strip()
+
+
+def parameter_shape(parameters):
+    """Describes bound parameters by type only; values never reach the log."""
+    if isinstance(parameters, dict):
+        return {name: type_name(value) for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type_name(value) for value in parameters]
+    return type_name(parameters)
+
+
+def type_name(value):
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+class SlowQueryLog:
+    """Writes statements slower than ``threshold_ms`` to a rotating JSON log.
+
+    Each line holds the statement, its normalized shape, the parameter
+    types, the route (or "background") and the plan from EXPLAIN (EXPLAIN
+    QUERY PLAN on SQLite). Plans are captured on a separate connection in a
+    worker thread, once per shape, so the request that ran the statement
+    never waits for them. ``python slow_query_report.py`` aggregates the log.
+    """
+
+    MAX_EXPLAINED_SHAPES = 512
+
+    def __init__(self, engine, threshold_ms, path, max_bytes=5 * 1024 * 1024, backups=3):
+        self.engine = engine
+        self.threshold = threshold_ms / 1000
+        self.logger = logging.getLogger(f"serenote.slow_queries.{path}")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        if not self.logger.handlers:
+            # Opened on the first slow statement, not at startup
+            self.logger.addHandler(RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, delay=True))
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="serenote-slow-queries")
+        self.plans = OrderedDict()
+        # An in-memory database exists on one connection only
+        self.can_explain = engine.url.database not in (None, "", ":memory:")
+
+    def record(self, statement, parameters, duration, executemany):
+        entry = {
+            "time": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(duration * 1000, 2),
+            "sql": sql_shape(statement),
+            "statement": statement[:2000],
+            "params": None if executemany else parameter_shape(parameters),
+            "route": f"{request.method} {request.endpoint}" if has_request_context() else "background",
+            "dialect": self.engine.dialect.name,
+        }
+        explain = self.can_explain and not executemany and EXPLAINABLE.match(statement)
+        self.executor.submit(self.write, entry, statement, parameters if explain else None, explain)
+
+    def write(self, entry, statement, parameters, explain):
+        try:
+            entry["plan"] = self.explain(entry["sql"], statement, parameters) if explain else None
+        except Exception as e:
+            entry["plan"] = None
+            entry["plan_error"] = str(e)[:200]
+        self.logger.info(json.dumps(entry, default=str))
+
+    def explain(self, shape, statement, parameters):
+        if shape in self.plans:
+            self.plans.move_to_end(shape)
+            return self.plans[shape]
+        sqlite = self.engine.dialect.name == "sqlite"
+        prefix = "EXPLAIN QUERY PLAN " if sqlite else "EXPLAIN "
+        with self.engine.connect().execution_options(skip_query_log=True) as connection:
+            rows = connection.exec_driver_sql(prefix + statement, parameters or ()).fetchall()
+            connection.rollback()
+        # SQLite rows are (id, parent, notused, detail); Postgres rows are plan lines
+        plan = [row[-1] for row in rows]
+        self.plans[shape] = plan
+        if len(self.plans) > self.MAX_EXPLAINED_SHAPES:
+            self.plans.popitem(last=False)
+        return plan
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is None or context.execution_options.get("skip_query_log"):
+        return
+    duration = time.perf_counter() - context._query_started
+    if slow_query_log is not None and duration >= slow_query_log.threshold:
+        slow_query_log.record(statement, parameters, duration, executemany)
+
+    # Only requests are measured; background tasks and scripts run outside one
+    if not has_request_context():
+        return
+    stats = g.get("query_stats")
+    if stats is None:
+        stats = g.query_stats = QueryStats()
+    stats.duration += duration
+    # executemany / insertmanyvalues send one statement in several cursor
+    # batches that share a context; count the statement once
+    if getattr(context, "_query_counted", False):
+        return
+    context._query_counted = True
+    stats.count += 1
+    stats.shapes[sql_shape(statement)] += 1
+
+
+def init_query_instrumentation(app, engine):
+    """Counts statements and database time per request.
+
+    Each response gets a ``Server-Timing: db;dur=<ms>;desc="<n> queries"``
+    header. A SQL shape repeated more than QUERY_REPEAT_THRESHOLD times in
+    one request is reported as a likely N+1 query: printed normally, raised
+    as RepeatedQueryError when the app is TESTING. Statements run while a
+    streamed body is being sent are not counted.
+
+    With SLOW_QUERY_MS set, statements at least that slow are written to
+    SLOW_QUERY_LOG by a SlowQueryLog.
+    """
+    global slow_query_log
+    app.config.setdefault("QUERY_REPEAT_THRESHOLD", DEFAULT_REPEAT_THRESHOLD)
+    if app.config.get("SLOW_QUERY_MS"):
+        slow_query_log = SlowQueryLog(engine, app.config["SLOW_QUERY_MS"], app.config["SLOW_QUERY_LOG"])
+    if not event.contains(engine, "before_cursor_execute", before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+    @app.after_request
+    def add_query_stats(response):
+        stats = g.pop("query_stats", None)
+        if stats is None:
+            return response
+        response.headers.add(
+            "Server-Timing", f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"'
+        )
+
+        threshold = app.config["QUERY_REPEAT_THRESHOLD"]
+        repeated = [(shape, count) for shape, count in stats.shapes.items() if count > threshold]
+        for shape, count in repeated:
+            message = f"Possible N+1 in {request.method} {request.endpoint}: {count}x {shape[:200]}"
+            if app.config.get("TESTING"):
+                raise RepeatedQueryError(message)
+            print(message)
+        return response
@@ -0,0 +1,94 @@
+"""
+Versioned schema migrations.
+
+Each ``mNNNN_<name>.py`` module in this package defines ``upgrade(ops)``
+using the idempotent helpers in ``operations.py``. Applied versions are
+recorded in the ``schema_migrations`` table. Run ``python migrate.py`` to
+apply pending migrations and ``python migrate.py status`` to list them.
+
+New databases get every table and index from the models through
+``init_db()``, which then records all migrations as applied.
+"""
+import importlib
+import pkgutil
+import re
+from datetime import datetime, timezone
+from sqlalchemy import text
+from .operations import Operations
+
+MIGRATION_MODULE = re.compile(r"^m(\d{4})_(\w+)$")
+
+# Serialises concurrent runners (e.g. several deploys at once) on Postgres
+ADVISORY_LOCK_ID = 724_001
+
+
+def load_migrations():
+    """Returns ``[(version, name, module)]`` sorted by version."""
+    migrations = []
+    for module_info in pkgutil.iter_modules(__path__):
+        match = MIGRATION_MODULE.match(module_info.name)
+        if match:
+            module = importlib.import_module(f"{__name__}.{module_info.name}")
+            migrations.append((int(match.group(1)), match.group(2), module))
+    return sorted(migrations, key=lambda migration: migration[0])
+
+
+def ensure_version_table(connection):
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, name VARCHAR(200) NOT NULL, applied_at VARCHAR(40) NOT NULL)"
+    ))
+
+
+def applied_versions(connection):
+    ensure_version_table(connection)
+    return {row[0] for row in connection.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def record_version(connection, version, name):
+    connection.execute(
+        text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+        {"version": version, "name": name, "applied_at": datetime.now(timezone.utc).isoformat()}
+    )
+
+
+def pending_migrations(engine):
+    with engine.connect() as connection:
+        applied = applied_versions(connection)
+        connection.commit()
+    return [(version, name) for version, name, _ in load_migrations() if version not in applied]
+
+
+def upgrade(engine):
+    """Applies pending migrations in order; returns the versions applied."""
+    applied_now = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        ops = Operations(connection)
+        if ops.is_postgres:
+            connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": ADVISORY_LOCK_ID})
+        try:
+            applied = applied_versions(connection)
+            for version, name, module in load_migrations():
+                if version in applied:
+                    continue
+                print(f"Applying {version:04d}_{name}")
+                module.upgrade(ops)
+                record_version(connection, version, name)
+                applied_now.append(version)
+        finally:
+            if ops.is_postgres:
+                connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": ADVISORY_LOCK_ID})
+    return applied_now
+
+
+def stamp(engine):
+    """Records every migration as applied without running it.
+
+    Used for databases created from the current models, which already have
+    the full schema.
+    """
+    with engine.begin() as connection:
+        applied = applied_versions(connection)
+        for version, name, _ in load_migrations():
+            if version not in applied:
+                record_version(connection, version, name)
@@ -0,0 +1,30 @@
+"""Columns and indexes that add_column.py used to apply by hand."""
+from sqlalchemy import Column, Integer, String, Float, Boolean, LargeBinary
+
+
+def upgrade(ops):
+    # Voice-note storage and metadata
+    ops.add_column("entries", Column("audio_data", LargeBinary))
+    ops.add_column("entries", Column("audio_size", Integer))
+    ops.add_column("entries", Column("audio_sha256", String(64)))
+    ops.add_column("entries", Column("audio_duration", Float))
+    ops.add_column("entries", Column("audio_codec", String(20)))
+    ops.add_column("entries", Column("audio_sample_rate", Integer))
+    ops.add_column("entries", Column("waveform", LargeBinary))
+    ops.add_column("audio_blobs", Column("transcoded", Boolean, nullable=False, server_default="0"))
+
+    # ETags and delta sync
+    ops.add_column("users", Column("data_version", Integer, nullable=False, server_default="0"))
+    ops.add_column("entries", Column("version", Integer, nullable=False, server_default="0"))
+    ops.add_column("todos", Column("version", Integer, nullable=False, server_default="0"))
+    ops.add_column("garden_flowers", Column("version", Integer, nullable=False, server_default="0"))
+
+    # Keyset pagination and listing filters
+    ops.create_index("ix_entries_user_created_id", "entries", ["user_id", "created_at DESC", "id DESC"])
+    ops.create_index("ix_entries_user_type_created", "entries", ["user_id", "type", "created_at"])
+    ops.create_index("ix_entries_user_mood", "entries", ["user_id", "mood"])
+
+    # Delta sync
+    ops.create_index("ix_entries_user_version", "entries", ["user_id", "version"])
+    ops.create_index("ix_todos_user_version", "todos", ["user_id", "version"])
+    ops.create_index("ix_garden_flowers_garden_version", "garden_flowers", ["garden_id", "version"])
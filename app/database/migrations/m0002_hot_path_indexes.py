@@ -0,0 +1,11 @@
+"""Indexes for the todo list and garden lookups.
+
+Entry listings by (user_id, created_at) and (user_id, type) are already
+served by the leading columns of ix_entries_user_created_id and
+ix_entries_user_type_created from 0001, so no duplicates are added.
+"""
+
+
+def upgrade(ops):
+    ops.create_index("ix_todos_user_completed_due", "todos", ["user_id", "completed", "due_date"])
+    ops.create_index("ix_garden_flowers_garden_mood", "garden_flowers", ["garden_id", "mood_type"])
@@ -0,0 +1,68 @@
+"""Timestamps move from IST wall time to UTC; entries get a local_date.
+
+On SQLite the app wrote IST wall time, which is shifted back by 5:30. On
+Postgres the IST-aware values were already converted to the session time
+zone on write, so they are reinterpreted from that zone (a no-op under UTC,
+the usual setting). Every existing user starts in Asia/Kolkata, and
+entries.local_date is backfilled for it.
+
+The conversion and the new columns commit together, so a failed run never
+shifts the same timestamps twice.
+"""
+from sqlalchemy import Column, Date, String
+
+LEGACY_TIMEZONE = "Asia/Kolkata"
+# Asia/Kolkata has kept this offset since 1945
+LEGACY_OFFSET = "330 minutes"
+
+# Every column the app filled with the current time
+TIMESTAMP_COLUMNS = {
+    "entries": ["created_at"],
+    "gardens": ["last_updated", "last_watered"],
+    "garden_flowers": ["planted_date", "last_growth"],
+    "todos": ["created_at", "updated_at"],
+    "idempotency_keys": ["created_at", "expires_at"],
+    "sync_tombstones": ["deleted_at"],
+    "audio_blobs": ["created_at", "released_at"],
+    "voice_uploads": ["created_at", "expires_at"],
+    "audio_transcodes": ["queued_at", "started_at", "finished_at"],
+}
+
+
+def upgrade(ops):
+    with ops.transaction() as tx:
+        if not tx.has_column("users", "timezone"):
+            convert_to_utc(tx)
+            tx.add_column("users", Column("timezone", String(64), nullable=False, server_default=LEGACY_TIMEZONE))
+            tx.add_column("entries", Column("local_date", Date))
+            backfill_local_date(tx)
+    ops.create_index("ix_entries_user_local_date", "entries", ["user_id", "local_date"])
+
+
+def convert_to_utc(ops):
+    if ops.is_postgres:
+        session_zone = ops.execute("SHOW TimeZone").scalar()
+        if session_zone.upper() in ("UTC", "ETC/UTC", "GMT", "ETC/GMT"):
+            return
+    for table, columns in TIMESTAMP_COLUMNS.items():
+        if not ops.has_table(table):
+            continue
+        for column in columns:
+            if not ops.has_column(table, column):
+                continue
+            if ops.is_postgres:
+                converted = f"({column} AT TIME ZONE current_setting('TimeZone')) AT TIME ZONE 'UTC'"
+            else:
+                # Keep the microseconds SQLAlchemy stores after position 19
+                converted = f"strftime('%Y-%m-%d %H:%M:%S', {column}, '-{LEGACY_OFFSET}') || substr({column}, 20)"
+            ops.execute(f"UPDATE {table} SET {column} = {converted} WHERE {column} IS NOT NULL")
+        print(f"  converted {table} timestamps to UTC")
+
+
+def backfill_local_date(ops):
+    if ops.is_postgres:
+        local_date = f"(created_at AT TIME ZONE 'UTC' AT TIME ZONE '{LEGACY_TIMEZONE}')::date"
+    else:
+        local_date = f"date(created_at, '+{LEGACY_OFFSET}')"
+    ops.execute(f"UPDATE entries SET local_date = {local_date} WHERE created_at IS NOT NULL")
+    print("  backfilled entries.local_date")
@@ -0,0 +1,39 @@
+"""Per-user streak counters, backfilled from existing entries.
+
+The backfill runs the same gaps-and-islands computation as
+app/database/streaks.py for every user at once, partitioned by user.
+"""
+from sqlalchemy import Column, Date, ForeignKey, Integer, MetaData, Table
+
+user_stats = Table(
+    "user_stats", MetaData(),
+    Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
+    Column("current_streak", Integer, nullable=False),
+    Column("longest_streak", Integer, nullable=False),
+    Column("last_entry_date", Date),
+)
+
+
+def upgrade(ops):
+    ops.create_table(user_stats)
+    day_number = "(day - DATE '1970-01-01')" if ops.is_postgres else "CAST(julianday(day) AS INTEGER)"
+    ops.execute(f"""
+        INSERT INTO user_stats (user_id, current_streak, longest_streak, last_entry_date)
+        SELECT user_id, length, longest, last_day FROM (
+            SELECT user_id, last_day, length,
+                   MAX(length) OVER (PARTITION BY user_id) AS longest,
+                   ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY last_day DESC) AS run_rank
+            FROM (
+                SELECT user_id, MAX(day) AS last_day, COUNT(*) AS length
+                FROM (
+                    SELECT user_id, day,
+                           {day_number} - ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY day) AS island
+                    FROM (SELECT DISTINCT user_id, local_date AS day FROM entries
+                          WHERE local_date IS NOT NULL AND user_id IS NOT NULL) AS days
+                ) AS islands
+                GROUP BY user_id, island
+            ) AS runs
+        ) AS ranked
+        WHERE run_rank = 1 AND user_id NOT IN (SELECT user_id FROM user_stats)
+    """)
+    print("  backfilled user_stats")
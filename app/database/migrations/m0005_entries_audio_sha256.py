@@ -0,0 +1,10 @@
+"""Index for the waveform lookup by recording hash.
+
+generate_waveform looks for peaks already computed for the same audio
+(entries.audio_sha256) on every voice upload; without an index that is a
+full scan of entries.
+"""
+
+
+def upgrade(ops):
+    ops.create_index("ix_entries_audio_sha256", "entries", ["audio_sha256"])
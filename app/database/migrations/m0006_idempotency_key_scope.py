@@ -0,0 +1,19 @@
+"""Scope idempotency keys to a user and remember what they were used for.
+
+Keys used to be unique per endpoint only, so two users sending the same
+key shared one stored response. Keys stored before this migration carry
+no fingerprint to check a retry against; they expire within a day anyway
+and are dropped rather than replayed unchecked.
+"""
+from sqlalchemy import Column, Integer, String
+
+
+def upgrade(ops):
+    ops.add_column("idempotency_keys", Column("user_id", Integer, nullable=False, server_default="0"))
+    ops.add_column("idempotency_keys", Column("fingerprint", String(64)))
+    if ops.has_table("idempotency_keys"):
+        ops.execute("DELETE FROM idempotency_keys WHERE fingerprint IS NULL")
+    ops.create_index(
+        "ux_idempotency_keys_key_endpoint_user", "idempotency_keys", ["key", "endpoint", "user_id"], unique=True
+    )
+    ops.drop_index("ux_idempotency_keys_key_endpoint")
@@ -0,0 +1,20 @@
+"""Rebuild the keyset pagination index with id descending.
+
+Entry listings order by (created_at DESC, id DESC), but 0001 used to build
+ix_entries_user_created_id with id ascending, so ties on created_at were
+walked against the index order. Only an index still in that shape is
+rebuilt; databases where 0001 already built it descending are left alone.
+The old index is dropped first because create_index skips a name that
+already exists.
+"""
+import re
+
+ID_DESCENDING = re.compile(r"\bid\s+DESC\b", re.IGNORECASE)
+
+
+def upgrade(ops):
+    definition = ops.index_definition("ix_entries_user_created_id")
+    if definition is not None and ID_DESCENDING.search(definition):
+        return
+    ops.drop_index("ix_entries_user_created_id")
+    ops.create_index("ix_entries_user_created_id", "entries", ["user_id", "created_at DESC", "id DESC"])
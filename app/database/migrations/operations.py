@@ -0,0 +1,103 @@
+from contextlib import contextmanager
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
+
+
+class Operations:
+    """Schema changes available to migrations.
+
+    Every operation checks the live schema first and does nothing if the
+    change is already there, so a migration that failed halfway can simply
+    be run again. Statements run in autocommit mode, which Postgres requires
+    for ``CREATE INDEX CONCURRENTLY``.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.dialect = connection.dialect
+        self.is_postgres = self.dialect.name == "postgresql"
+
+    @contextmanager
+    def transaction(self):
+        """Yields Operations on a separate connection inside one transaction.
+
+        For data conversions that must apply as a whole or not at all. Column
+        changes can join them (DDL is transactional on SQLite and Postgres),
+        but concurrent index builds can't and belong outside.
+        """
+        with self.connection.engine.begin() as connection:
+            yield Operations(connection)
+
+    def execute(self, sql, **params):
+        return self.connection.execute(text(sql), params)
+
+    def has_table(self, table):
+        return inspect(self.connection).has_table(table)
+
+    def has_column(self, table, column):
+        return column in {c["name"] for c in inspect(self.connection).get_columns(table)}
+
+    def create_table(self, table):
+        """Creates ``table`` (a SQLAlchemy Table) if missing."""
+        if self.has_table(table.name):
+            return False
+        table.create(self.connection)
+        print(f"  created table {table.name}")
+        return True
+
+    def add_column(self, table, column):
+        """Adds ``column`` (a SQLAlchemy Column) to ``table`` if missing.
+
+        The column definition is compiled for the current database, so the
+        same migration emits BLOB on SQLite and BYTEA on Postgres.
+        """
+        if not self.has_table(table) or self.has_column(table, column.name):
+            return False
+        column_sql = CreateColumn(column).compile(dialect=self.dialect)
+        self.execute(f"ALTER TABLE {table} ADD COLUMN {column_sql}")
+        print(f"  added {table}.{column.name}")
+        return True
+
+    def create_index(self, name, table, columns, unique=False):
+        """Creates an index if missing; ``columns`` may carry DESC.
+
+        On Postgres the index is built CONCURRENTLY so writes to the table
+        are not blocked. A concurrent build that failed leaves an invalid
+        index behind, which is dropped and rebuilt.
+        """
+        if not self.has_table(table):
+            return False
+        unique_sql = "UNIQUE " if unique else ""
+        columns_sql = ", ".join(columns)
+        if self.is_postgres:
+            if self.index_is_valid(name):
+                return False
+            self.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+            self.execute(f"CREATE {unique_sql}INDEX CONCURRENTLY {name} ON {table} ({columns_sql})")
+        else:
+            if name in {index["name"] for index in inspect(self.connection).get_indexes(table)}:
+                return False
+            self.execute(f"CREATE {unique_sql}INDEX IF NOT EXISTS {name} ON {table} ({columns_sql})")
+        print(f"  created index {name}")
+        return True
+
+    def index_is_valid(self, name):
+        return self.execute(
+            "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND pg_table_is_visible(c.oid)",
+            name=name
+        ).scalar() is True
+
+    def index_definition(self, name):
+        """Returns the CREATE INDEX statement of an index, or None if missing."""
+        if self.is_postgres:
+            return self.execute(
+                "SELECT pg_get_indexdef(c.oid) FROM pg_class c "
+                "WHERE c.relname = :name AND c.relkind = 'i' AND pg_table_is_visible(c.oid)",
+                name=name
+            ).scalar()
+        return self.execute("SELECT sql FROM sqlite_master WHERE type = 'index' AND name = :name", name=name).scalar()
+
+    def drop_index(self, name):
+        concurrently = "CONCURRENTLY " if self.is_postgres else ""
+        self.execute(f"DROP INDEX {concurrently}IF EXISTS {name}")
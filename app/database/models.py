@@ -1,17 +1,17 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Float, LargeBinary
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, ForeignKey, Boolean, Float, LargeBinary, Index, event, select
+from sqlalchemy.orm import relationship, deferred
 from .db import Base
-import datetime
-from datetime import timezone, timedelta
-
-# IST timezone (UTC+5:30)
-IST = timezone(timedelta(hours=5, minutes=30))
+from .timezones import DEFAULT_TIMEZONE, utcnow, local_date
 
 class User(Base):
     __tablename__ = 'users'
     id = Column(Integer, primary_key=True)
     username = Column(String(100), unique=True, nullable=False)
     password = Column(String(200), nullable=False)  # hashed
+    # Bumped on every write to the user's entries, todos or garden
+    data_version = Column(Integer, nullable=False, default=0, server_default="0")
+    # IANA zone deciding which calendar day an entry belongs to
+    timezone = Column(String(64), nullable=False, default=DEFAULT_TIMEZONE, server_default=DEFAULT_TIMEZONE)
 
     entries = relationship("Entry", back_populates="user")
     garden = relationship("Garden", uselist=False, back_populates="user")
@@ -21,24 +21,67 @@ class Entry(Base):
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     title = Column(String(200))
-    content = Column(Text)
+    # Heavy columns are deferred: they are only read when a query asks for them
+    content = deferred(Column(Text))
     type = Column(String(50))   # text or voice
     mood = Column(String(50))
     audio_path = Column(String(300), nullable=True)
-    audio_data = Column(LargeBinary, nullable=True)
+    audio_data = deferred(Column(LargeBinary, nullable=True))  # legacy inline recordings
+    audio_size = Column(Integer, nullable=True)  # bytes
+    audio_sha256 = Column(String(64), nullable=True)
+    # Read from the container header while the upload streams in
+    audio_duration = Column(Float, nullable=True)  # seconds
+    audio_codec = Column(String(20), nullable=True)  # e.g. opus
+    audio_sample_rate = Column(Integer, nullable=True)  # Hz
+    waveform = Column(LargeBinary, nullable=True)  # peak per bucket (0-127), filled in after upload
     is_capsule = Column(Boolean, default=False)
     capsule_open_date = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, default=lambda: datetime.datetime.now(IST))
-
+    created_at = Column(DateTime, default=utcnow)  # UTC
+    # Day of created_at in the user's time zone, set on insert
+    local_date = Column(Date, nullable=True)
+    # User data_version at the last write, for delta sync
+    version = Column(Integer, nullable=False, default=0, server_default="0")
 
     user = relationship("User", back_populates="entries")
 
+    __table_args__ = (
+        # Keyset pagination walks (created_at, id) newest-first per user
+        Index("ix_entries_user_created_id", user_id, created_at.desc(), id.desc()),
+        # Server-side filters on the entry listing
+        Index("ix_entries_user_type_created", user_id, type, created_at),
+        Index("ix_entries_user_mood", user_id, mood),
+        Index("ix_entries_user_version", user_id, version),
+        # Streaks and day filters are range scans on the local day
+        Index("ix_entries_user_local_date", user_id, local_date),
+        # Waveforms are reused across entries sharing a recording
+        Index("ix_entries_audio_sha256", audio_sha256),
+    )
+
+
+@event.listens_for(Entry, "before_insert")
+def set_entry_local_date(mapper, connection, entry):
+    """Fills in local_date from created_at and the user's time zone."""
+    if entry.created_at is None:
+        entry.created_at = utcnow()
+    if entry.local_date is None:
+        zone = connection.execute(select(User.timezone).where(User.id == entry.user_id)).scalar()
+        entry.local_date = local_date(entry.created_at, zone)
+
+# Journaling streaks per user, kept current on every entry insert and delete
+class UserStats(Base):
+    __tablename__ = "user_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    current_streak = Column(Integer, nullable=False, default=0)  # days in the run ending at last_entry_date
+    longest_streak = Column(Integer, nullable=False, default=0)
+    last_entry_date = Column(Date, nullable=True)  # latest local_date with an entry
+
 class Garden(Base):
     __tablename__ = "gardens"
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), unique=True)
-    last_updated = Column(DateTime, default=lambda: datetime.datetime.now(IST))
+    last_updated = Column(DateTime, default=utcnow)
     overall_vibe = Column(String(100))
 
     # Garden progression data
@@ -72,12 +115,19 @@ class GardenFlower(Base):
     position_x = Column(Float, default=0.0)  # percentage position in garden
     position_y = Column(Float, default=0.0)
     health = Column(Float, default=1.0)  # 0.0 to 1.0
-    planted_date = Column(DateTime, default=lambda: datetime.datetime.now(IST))
-    last_growth = Column(DateTime, default=lambda: datetime.datetime.now(IST))
+    planted_date = Column(DateTime, default=utcnow)
+    last_growth = Column(DateTime, default=utcnow)
     bloom_count = Column(Integer, default=0)  # how many times it has bloomed
+    version = Column(Integer, nullable=False, default=0, server_default="0")  # for delta sync
 
     garden = relationship("Garden", back_populates="flowers_data")
 
+    __table_args__ = (
+        Index("ix_garden_flowers_garden_version", garden_id, version),
+        # grow_garden looks up a garden's flower for a mood
+        Index("ix_garden_flowers_garden_mood", garden_id, mood_type),
+    )
+
 class Todo(Base):
     __tablename__ = "todos"
 
@@ -89,7 +139,108 @@ class Todo(Base):
     priority = Column(String(20), default="medium")  # low, medium, high
     category = Column(String(50), default="general")  # work, personal, health, etc.
     due_date = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, default=lambda: datetime.datetime.now(IST))
-    updated_at = Column(DateTime, default=lambda: datetime.datetime.now(IST), onupdate=lambda: datetime.datetime.now(IST))
+    created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
+    version = Column(Integer, nullable=False, default=0, server_default="0")  # for delta sync
 
     user = relationship("User")
+
+    __table_args__ = (
+        Index("ix_todos_user_version", user_id, version),
+        # Pending/overdue todo lookups and stats
+        Index("ix_todos_user_completed_due", user_id, completed, due_date),
+    )
+
+# Responses remembered per Idempotency-Key so client retries don't re-insert
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True)
+    key = Column(String(255), nullable=False)
+    endpoint = Column(String(100), nullable=False)
+    # Keys are per user (0 when the request names none)
+    user_id = Column(Integer, nullable=False, default=0, server_default="0")
+    # sha256 of method, path and body; a reused key must match it
+    fingerprint = Column(String(64), nullable=True)
+    status_code = Column(Integer, nullable=True)  # NULL while the first request is in flight
+    response_body = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=utcnow)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ux_idempotency_keys_key_endpoint_user", key, endpoint, user_id, unique=True),
+        Index("ix_idempotency_keys_expires_at", expires_at),
+    )
+
+# Deleted rows, so delta sync clients know what to drop
+class SyncTombstone(Base):
+    __tablename__ = "sync_tombstones"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    kind = Column(String(20), nullable=False)  # entry, todo or flower
+    object_id = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, default=utcnow)
+
+    __table_args__ = (
+        Index("ix_sync_tombstones_user_version", user_id, version),
+    )
+
+# Stored recordings addressed by content hash, shared by identical uploads
+class AudioBlob(Base):
+    __tablename__ = "audio_blobs"
+
+    id = Column(Integer, primary_key=True)
+    sha256 = Column(String(64), nullable=False)
+    key = Column(String(100), nullable=False)  # storage key, "blob_<sha256><ext>"
+    size = Column(Integer, nullable=False)  # bytes
+    ref_count = Column(Integer, nullable=False, default=0)  # entries using this blob
+    created_at = Column(DateTime, default=utcnow)
+    released_at = Column(DateTime, nullable=True)  # when ref_count last dropped
+    # Already at the target encoding (or re-encoding would not save enough)
+    transcoded = Column(Boolean, nullable=False, default=False, server_default="0")
+
+    __table_args__ = (
+        Index("ux_audio_blobs_sha256", sha256, unique=True),
+        # Garbage collection looks for unreferenced blobs by release time
+        Index("ix_audio_blobs_ref_count_released", ref_count, released_at),
+    )
+
+# Resumable voice uploads in progress; chunks live on disk until completion
+class VoiceUpload(Base):
+    __tablename__ = "voice_uploads"
+
+    id = Column(String(32), primary_key=True)  # random token handed to the client
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    extension = Column(String(10), nullable=False)
+    title = Column(String(200))
+    mood = Column(String(50))
+    is_capsule = Column(Boolean, default=False)
+    capsule_open_date = Column(DateTime, nullable=True)
+    entry_id = Column(Integer, nullable=True)  # set once completed
+    created_at = Column(DateTime, default=utcnow)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_voice_uploads_expires_at", expires_at),
+    )
+
+# One row per background re-encode, kept as metrics (bytes saved, queue latency)
+class AudioTranscode(Base):
+    __tablename__ = "audio_transcodes"
+
+    id = Column(Integer, primary_key=True)
+    entry_id = Column(Integer, nullable=False)
+    source_key = Column(String(100), nullable=False)
+    target_key = Column(String(100), nullable=True)
+    status = Column(String(20), nullable=False)  # done, skipped or failed
+    bytes_before = Column(Integer, nullable=True)
+    bytes_after = Column(Integer, nullable=True)
+    queued_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_audio_transcodes_finished_at", finished_at),
+    )
@@ -0,0 +1,102 @@
+from sqlalchemy import Integer, func, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from .db import db_session
+from .models import Entry, UserStats
+
+
+class day_number(FunctionElement):
+    """Whole days since a fixed epoch, so consecutive dates differ by one."""
+    type = Integer()
+    inherit_cache = True
+
+
+@compiles(day_number)
+def compile_day_number(element, compiler, **kw):
+    return f"CAST(julianday({compiler.process(element.clauses, **kw)}) AS INTEGER)"
+
+
+@compiles(day_number, "postgresql")
+def compile_day_number_postgresql(element, compiler, **kw):
+    return f"({compiler.process(element.clauses, **kw)} - DATE '1970-01-01')"
+
+
+def compute_streaks(user_id):
+    """Returns ``(current, longest, last_entry_date)`` in one query.
+
+    Gaps and islands: numbering a user's distinct entry days in order and
+    subtracting that from the day number gives the same value for every day
+    of a consecutive run. Grouping on it yields the runs; window functions
+    pick the longest and the latest. ``current`` is the length of the run
+    ending at ``last_entry_date``.
+    """
+    days = select(Entry.local_date.label("day")).where(
+        Entry.user_id == user_id, Entry.local_date.isnot(None)
+    ).distinct().subquery()
+    islands = select(
+        days.c.day,
+        (day_number(days.c.day) - func.row_number().over(order_by=days.c.day)).label("island")
+    ).subquery()
+    runs = select(
+        func.max(islands.c.day).label("last_day"), func.count().label("length")
+    ).group_by(islands.c.island).subquery()
+    ranked = select(
+        runs.c.last_day, runs.c.length,
+        func.max(runs.c.length).over().label("longest"),
+        func.row_number().over(order_by=runs.c.last_day.desc()).label("run_rank")
+    ).subquery()
+
+    row = db_session.execute(
+        select(ranked.c.length, ranked.c.longest, ranked.c.last_day).where(ranked.c.run_rank == 1)
+    ).first()
+    return tuple(row) if row else (0, 0, None)
+
+
+def refresh_streaks(user_id):
+    """Recomputes a user's stats row from their entries, without committing."""
+    current, longest, last_entry_date = compute_streaks(user_id)
+    stats = db_session.get(UserStats, user_id)
+    if stats is None:
+        stats = UserStats(user_id=user_id)
+        db_session.add(stats)
+    stats.current_streak = current
+    stats.longest_streak = longest
+    stats.last_entry_date = last_entry_date
+    return stats
+
+
+def record_entry_days(user_id, days):
+    """Updates a user's streaks for new entries on ``days``, without committing.
+
+    Entries on or after the last entry day extend or restart the current
+    run in place. Anything else (backdated imports, a missing stats row)
+    falls back to refresh_streaks. Call after the entries are flushed and,
+    like bump_data_version, within the writing transaction: the data
+    version bump locks the user row, so concurrent writers take turns.
+    """
+    days = sorted({day for day in days if day is not None})
+    if not days:
+        return
+    stats = db_session.get(UserStats, user_id)
+    if stats is None or stats.last_entry_date is None or days[0] < stats.last_entry_date:
+        refresh_streaks(user_id)
+        return
+    for day in days:
+        gap = (day - stats.last_entry_date).days
+        if gap == 0:
+            continue
+        stats.current_streak = stats.current_streak + 1 if gap == 1 else 1
+        stats.longest_streak = max(stats.longest_streak, stats.current_streak)
+        stats.last_entry_date = day
+
+
+def get_streaks(user_id, today):
+    """Returns ``(current, longest)`` for ``today`` from the stats row.
+
+    A streak is current only while it includes today.
+    """
+    stats = db_session.get(UserStats, user_id)
+    if stats is None:
+        return 0, 0
+    current = stats.current_streak if stats.last_entry_date == today else 0
+    return current, stats.longest_streak
@@ -0,0 +1,57 @@
+"""
+Time handling shared by the models, routes and background tasks.
+
+Timestamps are stored as naive UTC. Anything that depends on the calendar
+day (streaks, "today", day filters) uses the user's IANA time zone, stored
+on ``users.timezone``; each entry also keeps the day it was written in that
+zone as ``entries.local_date``.
+"""
+from datetime import datetime, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Every user predates per-user time zones in India
+DEFAULT_TIMEZONE = "Asia/Kolkata"
+
+
+def utcnow():
+    """Returns the current time as naive UTC, the form stored in the database."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+@lru_cache(maxsize=256)
+def get_zone(name):
+    """Returns the ZoneInfo for ``name``, or the default zone if it is unknown."""
+    try:
+        return ZoneInfo(name or DEFAULT_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo(DEFAULT_TIMEZONE)
+
+
+def is_valid_timezone(name):
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError, TypeError):
+        return False
+    return True
+
+
+def to_utc(value):
+    """Converts a datetime to naive UTC; naive values are taken to be UTC."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def local_date(moment, zone_name):
+    """Returns the calendar day of a stored (naive UTC) time in ``zone_name``."""
+    return moment.replace(tzinfo=timezone.utc).astimezone(get_zone(zone_name)).date()
+
+
+def local_today(zone_name):
+    return datetime.now(get_zone(zone_name)).date()
+
+
+def isoformat_utc(moment):
+    """Renders a stored (naive UTC) time as ISO 8601 with an explicit offset."""
+    return moment.replace(tzinfo=timezone.utc).isoformat() if moment else None
@@ -0,0 +1,31 @@
+from sqlalchemy import update
+from .db import db_session
+from .models import User, SyncTombstone
+
+
+def bump_data_version(user_id):
+    """Increments a user's data version within the current transaction.
+
+    Call this before committing any write to the user's entries, todos or
+    garden so cached reads are invalidated. Returns the new version, or None
+    if the user does not exist.
+    """
+    db_session.execute(
+        update(User).where(User.id == user_id).values(data_version=User.data_version + 1)
+    )
+    return get_data_version(user_id)
+
+
+def record_tombstone(user_id, kind, object_id, version):
+    """Remembers that a user's ``kind`` row was deleted at ``version``."""
+    db_session.add(SyncTombstone(user_id=user_id, kind=kind, object_id=object_id, version=version))
+
+
+def get_data_version(user_id):
+    """Returns a user's current data version (a cheap primary-key lookup)."""
+    return db_session.query(User.data_version).filter_by(id=user_id).scalar()
+
+
+def get_user_timezone(user_id):
+    """Returns a user's IANA time zone name, or None if the user does not exist."""
+    return db_session.query(User.timezone).filter_by(id=user_id).scalar()
@@ -1,7 +1,14 @@
 from flask import Blueprint, request, jsonify
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import update
 from app.database.db import db_session
-from app.database.models import User
+from app.database.models import User, Entry
+from app.database.timezones import is_valid_timezone, local_date
+from app.database.versions import bump_data_version
+from app.database.streaks import refresh_streaks
+
+# Entries re-dated per round trip when a user changes time zone
+LOCAL_DATE_BATCH_SIZE = 1000
 
 auth_routes = Blueprint("auth", __name__)
 
@@ -37,4 +44,52 @@ def get_user(user_id):
     user = db_session.query(User).filter_by(id=user_id).first()
     if not user:
         return jsonify({"message": "User not found"}), 404
-    return jsonify({"userId": user.id, "username": user.username}), 200
+    return jsonify({"userId": user.id, "username": user.username, "timezone": user.timezone}), 200
+
+
+@auth_routes.route("/user/<int:user_id>/timezone", methods=["GET", "PUT"])
+def user_timezone(user_id):
+    """Reads or changes the IANA time zone (e.g. "Europe/Berlin") used for a
+    user's calendar days.
+
+    Changing it recomputes ``local_date`` on all of the user's entries in the
+    same transaction, so streaks and day filters follow the new zone.
+    """
+    user = db_session.query(User).filter_by(id=user_id).first()
+    if not user:
+        return jsonify({"message": "User not found"}), 404
+    if request.method == "GET":
+        return jsonify({"timezone": user.timezone}), 200
+
+    zone = (request.json or {}).get("timezone")
+    if not isinstance(zone, str) or not is_valid_timezone(zone):
+        return jsonify({"message": "timezone must be an IANA time zone name"}), 400
+    if zone != user.timezone:
+        user.timezone = zone
+        redate_entries(user_id, zone, bump_data_version(user_id))
+        refresh_streaks(user_id)
+        db_session.commit()
+    return jsonify({"message": "Time zone updated", "timezone": zone}), 200
+
+
+def redate_entries(user_id, zone, version):
+    """Recomputes local_date for a user's entries, one batch at a time.
+
+    Entries whose day changes are stamped with ``version`` so delta sync
+    sends them again.
+    """
+    last_id = 0
+    while True:
+        rows = db_session.query(Entry.id, Entry.created_at, Entry.local_date).filter(
+            Entry.user_id == user_id, Entry.id > last_id
+        ).order_by(Entry.id).limit(LOCAL_DATE_BATCH_SIZE).all()
+        if not rows:
+            return
+        changed = []
+        for entry_id, created_at, old_date in rows:
+            new_date = local_date(created_at, zone)
+            if new_date != old_date:
+                changed.append({"id": entry_id, "local_date": new_date, "version": version})
+        if changed:
+            db_session.execute(update(Entry), changed)
+        last_id = rows[-1][0]
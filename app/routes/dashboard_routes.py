@@ -1,15 +1,17 @@
 from flask import Blueprint, jsonify
 from app.database.db import db_session
 from app.database.models import Entry
+from app.database.streaks import get_streaks
+from app.database.timezones import local_today
+from app.database.versions import get_user_timezone
+from app.routes.http_cache import user_version_etag
 from sqlalchemy import func, desc
-from datetime import datetime, timedelta, timezone
-
-# IST timezone (UTC+5:30)
-IST = timezone(timedelta(hours=5, minutes=30))
+from datetime import timedelta
 
 dashboard_api = Blueprint("dashboard_api", __name__)
 
 @dashboard_api.route("/dashboard/data/<int:user_id>", methods=["GET"])
+@user_version_etag
 def get_dashboard_data(user_id):
     """Provides mood data as JSON for the frontend chart."""
 
@@ -29,25 +31,15 @@ def get_dashboard_data(user_id):
     return jsonify(mood_data)
 
 @dashboard_api.route("/dashboard/insights/<int:user_id>", methods=["GET"])
+@user_version_etag
 def get_dashboard_insights(user_id):
     """Provides enhanced insights: streaks, trends, etc."""
     # Total entries
     total_entries = db_session.query(func.count(Entry.id)).filter(Entry.user_id == user_id).scalar()
 
-    # Current streak (consecutive days with entries)
-    today = datetime.now(IST).date()
-    streak = 0
-    check_date = today
-    while True:
-        has_entry = db_session.query(Entry).filter(
-            Entry.user_id == user_id,
-            func.date(Entry.created_at) == check_date
-        ).first() is not None
-        if has_entry:
-            streak += 1
-            check_date -= timedelta(days=1)
-        else:
-            break
+    # Current streak (consecutive days with entries), kept in user_stats
+    today = local_today(get_user_timezone(user_id))
+    streak, longest_streak = get_streaks(user_id, today)
 
     # Most common mood
     mood_query = db_session.query(Entry.mood, func.count(Entry.mood)).filter(
@@ -55,20 +47,21 @@ def get_dashboard_insights(user_id):
     ).group_by(Entry.mood).order_by(desc(func.count(Entry.mood))).first()
     top_mood = mood_query[0] if mood_query else "None"
 
-    # Recent trend (last 7 days mood average - simplified)
-    week_ago = datetime.now(IST) - timedelta(days=7)
-    recent_entries = db_session.query(Entry).filter(
+    # Recent trend (last 7 days mood average - simplified). Whole local days,
+    # so the result only changes with the date the ETag already carries
+    recent_moods = db_session.query(Entry.mood).filter(
         Entry.user_id == user_id,
-        Entry.created_at >= week_ago
+        Entry.local_date > today - timedelta(days=7)
     ).all()
 
     mood_scores = {"Happy": 5, "Calm": 4, "Neutral": 3, "Sad": 2, "Angry": 1}
-    scores = [mood_scores.get(e.mood, 3) for e in recent_entries]
+    scores = [mood_scores.get(mood, 3) for (mood,) in recent_moods]
     avg_mood_score = sum(scores) / len(scores) if scores else 3
 
     return jsonify({
         "total_entries": total_entries,
         "current_streak": streak,
+        "longest_streak": longest_streak,
         "top_mood": top_mood,
         "avg_mood_score": round(avg_mood_score, 1),
         "insights": [
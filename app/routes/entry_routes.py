@@ -1,23 +1,82 @@
 # file: app/routes/entry_routes.py (Corrected)
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, redirect, send_file, stream_with_context, url_for
+from sqlalchemy import insert, update, func, case, distinct, tuple_
+from sqlalchemy.orm import load_only, undefer
 from app.database.db import db_session
-from app.database.models import Entry
-from datetime import datetime, timezone, timedelta
+from app.database.models import Entry, User, VoiceUpload
+from app.database.versions import bump_data_version, record_tombstone, get_user_timezone
+from app.database.timezones import utcnow, to_utc, local_date, isoformat_utc
+from app.database.streaks import record_entry_days, refresh_streaks
+from app.routes.garden_routes import grow_garden
+from app.routes.http_cache import user_version_etag
+from app.routes.idempotency import idempotent
+from app.storage import get_audio_storage, get_chunk_store
+from app.storage.resumable import (
+    ChunkTooLarge, DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE, MAX_CHUNKS, UPLOAD_ID_PATTERN,
+    upload_expiry, sweep_voice_uploads
+)
+from app.storage.blobs import store_audio, discard_audio, release_audio
+from app.tasks import run_in_background, generate_waveform, transcode_voice_note
+from app.audio import WebmProbe
+from datetime import datetime, timezone, date
 import openai
 import base64
-
-# IST timezone (UTC+5:30)
-IST = timezone(timedelta(hours=5, minutes=30))
+import io
+import json
+import os
+import secrets
 
 entry_routes = Blueprint("entry", __name__)
 
 # Set OpenAI API key (in production, use environment variable)
 openai.api_key = "your-openai-api-key-here"  # Replace with actual key or env var
 
+# Page sizes for keyset-paginated listings
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Rows fetched per round trip when streaming a full history as NDJSON
+STREAM_BATCH_SIZE = 200
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+# Largest batch accepted by /entries/bulk
+MAX_BULK_ENTRIES = 500
+
+# Public entry fields: the columns each one reads and how it is rendered.
+# ``?fields=`` picks a subset so queries only load what the caller uses.
+ENTRY_FIELDS = {
+    "id": ((Entry.id,), lambda entry: entry.id),
+    "title": ((Entry.title,), lambda entry: entry.title),
+    "content": ((Entry.content,), lambda entry: entry.content),
+    "mood": ((Entry.mood,), lambda entry: entry.mood),
+    "type": ((Entry.type,), lambda entry: entry.type),
+    "audio_path": ((Entry.audio_path,), lambda entry: entry.audio_path),
+    "is_capsule": ((Entry.is_capsule,), lambda entry: entry.is_capsule),
+    "capsule_open_date": ((Entry.capsule_open_date,), lambda entry: entry.capsule_open_date.isoformat() if entry.capsule_open_date else None),
+    "created_at": ((Entry.created_at,), lambda entry: isoformat_utc(entry.created_at)),
+    "local_date": ((Entry.local_date,), lambda entry: entry.local_date.isoformat() if entry.local_date else None),
+    "audio_url": ((Entry.type,), lambda entry: url_for("entry.get_entry_audio", entry_id=entry.id) if entry.type == "voice" else None),
+    "audio_duration": ((Entry.audio_duration,), lambda entry: entry.audio_duration),
+    "waveform": ((Entry.waveform,), lambda entry: base64.b64encode(entry.waveform).decode("ascii") if entry.waveform else None)
+}
+
+# Content types for stored recordings, keyed by file extension
+AUDIO_MIMETYPES = {
+    ".webm": "audio/webm",
+    ".ogg": "audio/ogg",
+    ".m4a": "audio/mp4",
+    ".wav": "audio/wav"
+}
+
 @entry_routes.route("/add", methods=["POST"])
+@idempotent
 def add_text_entry():
-    """Adds a new text-based journal entry."""
+    """Adds a new text-based journal entry and grows the user's garden.
+
+    The garden update shares the entry's transaction; its delta is returned
+    under ``garden`` so clients don't need a separate POST /garden/.
+    """
     data = request.json
     user_id = data.get("user_id")
     title = data.get("title")
@@ -37,6 +96,10 @@ def add_text_entry():
         except ValueError:
             return jsonify({"message": "Invalid capsule open date format"}), 400
 
+    version = bump_data_version(user_id)
+    if version is None:
+        db_session.rollback()
+        return jsonify({"message": "User not found"}), 404
     new_entry = Entry(
         user_id=user_id,
         title=title,
@@ -44,27 +107,305 @@ def add_text_entry():
         type="text",
         mood=mood,
         is_capsule=is_capsule,
-        capsule_open_date=capsule_date
+        capsule_open_date=capsule_date,
+        version=version
     )
     db_session.add(new_entry)
+    garden_delta = grow_garden(user_id, mood, 1.0, version)
+    db_session.flush()
+    entry_id = new_entry.id
+    record_entry_days(user_id, [new_entry.local_date])
+    db_session.commit()
+    return jsonify({"message": "Entry saved successfully", "id": entry_id, "garden": garden_delta}), 201
+
+@entry_routes.route("/bulk", methods=["POST"])
+@idempotent
+def add_entries_bulk():
+    """Adds many text entries for one user in a single transaction.
+
+    Expects ``{"user_id": ..., "entries": [...]}`` where each item takes the
+    same fields as /add plus an optional ISO ``created_at``. Every item is
+    validated first; the valid ones go in with a single multi-row INSERT
+    and ``results`` reports the outcome of each item by index.
+    """
+    data = request.json or {}
+    user_id = data.get("user_id")
+    items = data.get("entries")
+
+    if not user_id or not isinstance(items, list) or not items:
+        return jsonify({"message": "user_id and a non-empty entries list are required"}), 400
+    if len(items) > MAX_BULK_ENTRIES:
+        return jsonify({"message": f"At most {MAX_BULK_ENTRIES} entries per request"}), 400
+
+    version = bump_data_version(user_id)
+    if version is None:
+        db_session.rollback()
+        return jsonify({"message": "User not found"}), 404
+
+    now = utcnow()
+    # Bulk inserts skip ORM events, so local_date is filled in here
+    zone = get_user_timezone(user_id)
+    results = []
+    rows = []
+    for index, item in enumerate(items):
+        try:
+            row = validate_bulk_entry(item, now)
+            row["local_date"] = local_date(row["created_at"], zone)
+        except ValueError as e:
+            results.append({"index": index, "status": "error", "message": str(e)})
+            continue
+        row.update(user_id=user_id, type="text", version=version)
+        rows.append(row)
+        results.append({"index": index, "status": "created"})
+
+    if not rows:
+        db_session.rollback()
+        return jsonify({"message": "No valid entries", "created": 0, "results": results}), 400
+
+    # SQLAlchemy sends the rows as multi-row INSERT ... VALUES ... RETURNING
+    # batches (insertmanyvalues). Ids are assigned in VALUES order, so sorting
+    # the returned ids maps them back to the rows without the row-at-a-time
+    # fallback that sort_by_parameter_order needs on SQLite.
+    ids = sorted(db_session.scalars(insert(Entry).returning(Entry.id), rows).all())
+    record_entry_days(user_id, [row["local_date"] for row in rows])
     db_session.commit()
-    return jsonify({"message": "Entry saved successfully"}), 201
+
+    created = iter(ids)
+    for result in results:
+        if result["status"] == "created":
+            result["id"] = next(created)
+
+    return jsonify({"message": "Entries saved successfully", "created": len(ids), "results": results}), 201
+
+def validate_bulk_entry(item, now):
+    """Validates one /bulk item and returns its column values."""
+    if not isinstance(item, dict):
+        raise ValueError("Entry must be an object")
+    if not item.get("title") or not item.get("content"):
+        raise ValueError("Missing required fields")
+
+    is_capsule = bool(item.get("is_capsule", False))
+    capsule_date = None
+    if is_capsule and item.get("capsule_open_date"):
+        try:
+            capsule_date = datetime.fromisoformat(item["capsule_open_date"].replace('Z', '+00:00'))
+        except (AttributeError, ValueError):
+            raise ValueError("Invalid capsule open date format")
+
+    created_at = now
+    if item.get("created_at"):
+        if not isinstance(item["created_at"], str):
+            raise ValueError("Invalid created_at format")
+        created_at = parse_datetime_arg(item["created_at"], "created_at")
+
+    return {
+        "title": item["title"],
+        "content": item["content"],
+        "mood": item.get("mood", "Neutral"),
+        "is_capsule": is_capsule,
+        "capsule_open_date": capsule_date,
+        "created_at": created_at
+    }
 
 @entry_routes.route("/user/<int:user_id>", methods=["GET"])
+@user_version_etag
 def get_entries(user_id):
-    entries = db_session.query(Entry).filter_by(user_id=user_id).order_by(Entry.created_at.desc()).all()
-    result = []
-    for entry in entries:
-        entry_data = {
-            "id": entry.id, "title": entry.title, "content": entry.content,
-            "mood": entry.mood, "type": entry.type, "audio_path": entry.audio_path,
-            "is_capsule": entry.is_capsule, "capsule_open_date": entry.capsule_open_date.isoformat() if entry.capsule_open_date else None,
-            "created_at": entry.created_at.isoformat()
-        }
-        if entry.audio_data:
-            entry_data["audio_data"] = base64.b64encode(entry.audio_data).decode('utf-8')
-        result.append(entry_data)
-    return jsonify(result)
+    """Lists a user's entries, newest first.
+
+    Passing ``limit`` and/or ``cursor`` switches to keyset pagination on
+    ``(created_at, id)``: the response becomes ``{"entries": [...],
+    "next_cursor": ...}`` and ``next_cursor`` is fed back to get the next page.
+    Without either parameter the full history is returned as a plain list.
+
+    ``fields`` is an optional comma-separated subset of ENTRY_FIELDS, and
+    ``type``, ``mood``, ``from``, ``to`` and ``is_capsule`` filter the rows
+    in SQL (see apply_entry_filters).
+
+    Clients sending ``Accept: application/x-ndjson`` get the whole filtered
+    history streamed one entry per line instead, read from the database in
+    batches of STREAM_BATCH_SIZE (for exports, backups and cache rebuilds).
+    """
+    try:
+        fields = parse_fields(request.args.get("fields"))
+        query = apply_entry_filters(
+            db_session.query(Entry).options(load_only(*entry_columns(fields))).filter_by(user_id=user_id),
+            request.args
+        ).order_by(Entry.created_at.desc(), Entry.id.desc())
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    if request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE]) == NDJSON_MIMETYPE:
+        return Response(stream_with_context(generate_ndjson(query, fields)), mimetype=NDJSON_MIMETYPE)
+
+    if "limit" not in request.args and "cursor" not in request.args:
+        return jsonify([serialize_entry(entry, fields) for entry in query.all()])
+
+    try:
+        limit = parse_page_size(request.args.get("limit"))
+        cursor = decode_cursor(request.args["cursor"]) if request.args.get("cursor") else None
+    except ValueError:
+        return jsonify({"message": "Invalid limit or cursor"}), 400
+
+    if cursor:
+        cursor_created_at, cursor_id = cursor
+        # One row-value range on the (created_at DESC, id DESC) index
+        query = query.filter(tuple_(Entry.created_at, Entry.id) < tuple_(cursor_created_at, cursor_id))
+
+    # Fetch one extra row to know whether another page exists
+    entries = query.limit(limit + 1).all()
+    next_cursor = encode_cursor(entries[limit - 1]) if len(entries) > limit else None
+
+    return jsonify({
+        "entries": [serialize_entry(entry, fields) for entry in entries[:limit]],
+        "next_cursor": next_cursor
+    })
+
+def generate_ndjson(query, fields):
+    """Yields entries as NDJSON lines, keeping at most one batch in memory."""
+    for entry in query.execution_options(stream_results=True).yield_per(STREAM_BATCH_SIZE):
+        yield json.dumps(serialize_entry(entry, fields)) + "\n"
+
+def serialize_entry(entry, fields=None):
+    """Converts an entry into its JSON representation, limited to ``fields``."""
+    return {field: ENTRY_FIELDS[field][1](entry) for field in (fields or ENTRY_FIELDS)}
+
+def parse_fields(value):
+    """Parses the ``fields`` query parameter into a list of entry fields."""
+    if not value:
+        return list(ENTRY_FIELDS)
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in ENTRY_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+def entry_columns(fields):
+    """Columns to load for ``fields``; created_at is always needed for ordering."""
+    columns = {"created_at": Entry.created_at}
+    for field in fields:
+        columns.update((column.key, column) for column in ENTRY_FIELDS[field][0])
+    return list(columns.values())
+
+def apply_entry_filters(query, args):
+    """Narrows an entry query using listing query parameters.
+
+    ``type`` and ``mood`` accept comma-separated values, ``from``/``to`` take
+    ISO dates or datetimes (a bare ``to`` date includes that whole day) and
+    ``is_capsule`` takes true/false. Raises ValueError on malformed input.
+    """
+    types = split_arg(args.get("type"))
+    if types:
+        query = query.filter(Entry.type.in_(types))
+
+    moods = split_arg(args.get("mood"))
+    if moods:
+        query = query.filter(Entry.mood.in_(moods))
+
+    # Bare dates are days in the user's time zone, matched on local_date
+    if args.get("from"):
+        if len(args["from"]) == 10:
+            query = query.filter(Entry.local_date >= parse_date_arg(args["from"], "from"))
+        else:
+            query = query.filter(Entry.created_at >= parse_datetime_arg(args["from"], "from"))
+
+    if args.get("to"):
+        if len(args["to"]) == 10:
+            query = query.filter(Entry.local_date <= parse_date_arg(args["to"], "to"))
+        else:
+            query = query.filter(Entry.created_at <= parse_datetime_arg(args["to"], "to"))
+
+    if args.get("is_capsule"):
+        flag = args["is_capsule"].lower()
+        if flag not in ("true", "false", "1", "0"):
+            raise ValueError("is_capsule must be true or false")
+        query = query.filter(Entry.is_capsule == (flag in ("true", "1")))
+
+    return query
+
+def split_arg(value):
+    """Splits a comma-separated query parameter into its non-empty parts."""
+    return [part.strip() for part in (value or "").split(",") if part.strip()]
+
+def parse_datetime_arg(value, name):
+    """Parses an ISO datetime parameter into naive UTC, as created_at is stored.
+
+    Values without an offset are taken to be UTC.
+    """
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"Invalid {name} date format")
+    return to_utc(parsed)
+
+def parse_date_arg(value, name):
+    """Parses an ISO date (YYYY-MM-DD) parameter."""
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name} date format")
+
+def parse_page_size(value):
+    """Parses the ``limit`` query parameter, clamped to MAX_PAGE_SIZE."""
+    if value is None or value == "":
+        return DEFAULT_PAGE_SIZE
+    limit = int(value)
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, MAX_PAGE_SIZE)
+
+def encode_cursor(entry):
+    """Builds an opaque cursor pointing just past ``entry``."""
+    raw = json.dumps([entry.created_at.isoformat(), entry.id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor):
+    """Returns the ``(created_at, id)`` pair stored in a cursor."""
+    try:
+        created_at, entry_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(entry_id)
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError("Malformed cursor")
+
+@entry_routes.route("/<int:entry_id>/audio", methods=["GET"])
+def get_entry_audio(entry_id):
+    """Streams a voice note's recording.
+
+    Supports ``Range`` requests (206 Partial Content) plus ETag and
+    Last-Modified validators, so browsers can seek and lazily load audio.
+    """
+    entry = db_session.query(Entry).options(undefer(Entry.audio_data)).filter_by(id=entry_id).first()
+    if not entry or entry.type != "voice":
+        return jsonify({"message": "Voice note not found"}), 404
+
+    if entry.audio_data:
+        # created_at comes back naive from the database but holds UTC
+        created_at = entry.created_at.replace(tzinfo=timezone.utc)
+        return send_file(
+            io.BytesIO(entry.audio_data),
+            mimetype="audio/webm",
+            conditional=True,
+            etag=f"entry-{entry.id}-{len(entry.audio_data)}",
+            last_modified=created_at
+        )
+
+    if entry.audio_path:
+        storage = get_audio_storage()
+        # Old rows stored "/static/uploads/<name>"; the key is the file name
+        key = os.path.basename(entry.audio_path)
+        mimetype = AUDIO_MIMETYPES.get(os.path.splitext(key)[1].lower(), "application/octet-stream")
+
+        path = storage.local_path(key)
+        if path is not None:
+            if os.path.isfile(path):
+                return send_file(path, mimetype=mimetype, conditional=True, etag=entry.audio_sha256 or True)
+        else:
+            # Remote backends serve Range requests themselves
+            url = storage.url(key)
+            if url:
+                return redirect(url)
+            return send_file(storage.open(key), mimetype=mimetype, etag=entry.audio_sha256 or False)
+
+    return jsonify({"message": "Audio not found"}), 404
 
 @entry_routes.route("/delete/<int:entry_id>", methods=["DELETE"])
 def delete_entry(entry_id):
@@ -73,11 +414,22 @@ def delete_entry(entry_id):
     if not entry:
         return jsonify({"message": "Entry not found"}), 404
 
+    version = bump_data_version(entry.user_id)
+    record_tombstone(entry.user_id, "entry", entry.id, version)
+    # Shared recordings are reclaimed by garbage collection once unreferenced
+    owns_file = entry.audio_path and not release_audio(entry.audio_path)
+    audio_path = entry.audio_path
     db_session.delete(entry)
+    db_session.flush()
+    refresh_streaks(entry.user_id)
     db_session.commit()
+
+    if owns_file:
+        get_audio_storage().delete(os.path.basename(audio_path))
     return jsonify({"message": "Entry deleted successfully"}), 200
 
 @entry_routes.route("/voice", methods=["POST"])
+@idempotent
 def save_voice_note():
     print("Voice note: Received POST request to /entries/voice")
     if 'audio' not in request.files:
@@ -95,39 +447,267 @@ def save_voice_note():
         print("Voice note: Missing user_id or filename")
         return jsonify({"message": "Missing required data"}), 400
 
-    # Read the audio file data
     try:
-        audio_data = file.read()
-        print(f"Voice note: Read audio data, size={len(audio_data)} bytes")
-    except Exception as e:
-        print(f"Voice note: Error reading audio file: {e}")
-        return jsonify({"message": "Failed to read audio file"}), 500
+        user_id = int(user_id)
+    except ValueError:
+        return jsonify({"message": "Invalid user_id"}), 400
 
-    capsule_date = None
-    if is_capsule and capsule_open_date:
-        try:
-            capsule_date = datetime.fromisoformat(capsule_open_date.replace('Z', '+00:00'))
-        except ValueError:
-            return jsonify({"message": "Invalid capsule open date format"}), 400
+    try:
+        capsule_date = parse_capsule_date(is_capsule, capsule_open_date)
+    except ValueError:
+        return jsonify({"message": "Invalid capsule open date format"}), 400
+
+    extension = os.path.splitext(file.filename)[1].lower()
+    result, status = create_voice_entry(
+        user_id, file.stream, extension,
+        title=request.form.get("title"),
+        mood=request.form.get("mood"),
+        is_capsule=is_capsule,
+        capsule_open_date=capsule_date
+    )
+    return jsonify(result), status
+
+def parse_capsule_date(is_capsule, capsule_open_date):
+    if not is_capsule or not capsule_open_date:
+        return None
+    return datetime.fromisoformat(capsule_open_date.replace('Z', '+00:00'))
+
+def create_voice_entry(user_id, stream, extension, title=None, mood=None, is_capsule=False, capsule_open_date=None, upload_id=None):
+    """Stores a recording and creates its voice entry.
+
+    Shared by direct uploads and completed resumable uploads. Returns a
+    ``(body, status)`` pair for the response. With ``upload_id`` the upload
+    is marked completed in the same transaction as the entry insert.
+    """
+    # Stream the upload to audio storage in chunks; identical recordings share one blob
+    if extension not in AUDIO_MIMETYPES:
+        extension = ".webm"
+    storage = get_audio_storage()
+    # Duration and codec are picked out of the WebM header as the bytes go by
+    probe = WebmProbe()
+    if extension == ".webm":
+        stream = probe.reader(stream)
+    try:
+        filename, audio_size, audio_sha256, created = store_audio(storage, stream, extension)
+        print(f"Voice note: Stored audio as {filename}, size={audio_size} bytes, new={created}")
+    except Exception as e:
+        print(f"Voice note: Error storing audio file: {e}")
+        db_session.rollback()
+        return {"message": "Failed to read audio file"}, 500
 
+    metadata = probe.metadata()
     try:
+        version = bump_data_version(user_id)
+        if version is None:
+            discard_audio(storage, filename, created)
+            return {"message": "User not found"}, 404
         entry = Entry(
             user_id=user_id,
-            title=request.form.get("title"),
-            mood=request.form.get("mood"),
+            title=title,
+            mood=mood,
             type="voice",
-            audio_data=audio_data,
+            audio_path=filename,
+            audio_size=audio_size,
+            audio_sha256=audio_sha256,
+            audio_duration=metadata["duration"],
+            audio_codec=metadata["codec"],
+            audio_sample_rate=metadata["sample_rate"],
             is_capsule=is_capsule,
-            capsule_open_date=capsule_date
+            capsule_open_date=capsule_open_date,
+            version=version
         )
         db_session.add(entry)
-        db_session.commit()
-        print("Voice note: Database entry saved successfully")
+        # Voice notes grow the garden slightly less than text entries
+        garden_delta = grow_garden(user_id, entry.mood or "Neutral", 0.8, version)
+        db_session.flush()
+        entry_id = entry.id
+        record_entry_days(user_id, [entry.local_date])
+        # The conditional UPDATE waits for a concurrent completion of the same
+        # upload to commit (row lock on Postgres, write lock on SQLite) and
+        # then matches nothing, so an upload only ever creates one entry
+        claimed = upload_id is None or db_session.execute(
+            update(VoiceUpload)
+            .where(VoiceUpload.id == upload_id, VoiceUpload.entry_id.is_(None))
+            .values(entry_id=entry_id)
+        ).rowcount > 0
+        if claimed:
+            db_session.commit()
+            print("Voice note: Database entry saved successfully")
     except Exception as e:
         print(f"Voice note: Error saving to database: {e}")
-        return jsonify({"message": "Failed to save voice note"}), 500
+        discard_audio(storage, filename, created)
+        return {"message": "Failed to save voice note"}, 500
+
+    if not claimed:
+        discard_audio(storage, filename, created)
+        upload = db_session.get(VoiceUpload, upload_id)
+        if upload is None or upload.entry_id is None:
+            return {"message": "Upload not found or expired"}, 404
+        return {"message": "Voice note saved successfully", "id": upload.entry_id}, 200
+
+    # Waveform thumbnails and re-encoding happen off the request path
+    run_in_background(generate_waveform, entry_id)
+    if current_app.config["AUDIO_TRANSCODE"]:
+        run_in_background(transcode_voice_note, entry_id, utcnow())
+
+    return {"message": "Voice note saved successfully", "id": entry_id, "garden": garden_delta}, 200
+
+@entry_routes.route("/voice/uploads", methods=["POST"])
+def start_voice_upload():
+    """Starts a resumable voice upload.
+
+    The client then PUTs the recording in numbered chunks (any order, re-sent
+    as often as needed) and calls ``/complete``; only that last step creates
+    the entry. ``GET`` on the upload lists the chunks already received, so an
+    interrupted client resumes with the missing ones instead of starting over.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        user_id = int(data.get("user_id"))
+    except (TypeError, ValueError):
+        return jsonify({"message": "Missing or invalid user_id"}), 400
+    if db_session.get(User, user_id) is None:
+        return jsonify({"message": "User not found"}), 404
 
-    return jsonify({"message": "Voice note saved successfully"})
+    is_capsule = str(data.get("is_capsule", False)).lower() == "true"
+    try:
+        capsule_date = parse_capsule_date(is_capsule, data.get("capsule_open_date"))
+    except (AttributeError, ValueError):
+        return jsonify({"message": "Invalid capsule open date format"}), 400
+
+    extension = os.path.splitext(data.get("filename") or "")[1].lower()
+    sweep_voice_uploads(get_chunk_store())
+    upload = VoiceUpload(
+        id=secrets.token_hex(16),
+        user_id=user_id,
+        extension=extension if extension in AUDIO_MIMETYPES else ".webm",
+        title=data.get("title"),
+        mood=data.get("mood"),
+        is_capsule=is_capsule,
+        capsule_open_date=capsule_date,
+        expires_at=upload_expiry()
+    )
+    db_session.add(upload)
+    db_session.commit()
+    return jsonify({
+        "upload_id": upload.id,
+        "chunk_size": DEFAULT_CHUNK_SIZE,
+        "max_chunk_size": MAX_CHUNK_SIZE,
+        "expires_at": isoformat_utc(upload.expires_at)
+    }), 201
+
+@entry_routes.route("/voice/uploads/<upload_id>", methods=["GET"])
+def get_voice_upload(upload_id):
+    """Reports which chunks of an upload have arrived."""
+    upload = find_voice_upload(upload_id)
+    if upload is None:
+        return jsonify({"message": "Upload not found or expired"}), 404
+    chunks = get_chunk_store().received(upload.id)
+    return jsonify({
+        "upload_id": upload.id,
+        "received": sorted(chunks),
+        "received_bytes": sum(chunks.values()),
+        "completed": upload.entry_id is not None,
+        "entry_id": upload.entry_id
+    })
+
+@entry_routes.route("/voice/uploads/<upload_id>/chunks/<int:index>", methods=["PUT"])
+def put_voice_upload_chunk(upload_id, index):
+    """Stores one chunk (the raw request body) of a resumable upload."""
+    upload = find_voice_upload(upload_id)
+    if upload is None:
+        return jsonify({"message": "Upload not found or expired"}), 404
+    if upload.entry_id is not None:
+        return jsonify({"message": "Upload already completed"}), 409
+    if index >= MAX_CHUNKS:
+        return jsonify({"message": f"Uploads are limited to {MAX_CHUNKS} chunks"}), 400
+
+    try:
+        size = get_chunk_store().write_chunk(upload.id, index, request.stream)
+    except ChunkTooLarge as e:
+        return jsonify({"message": str(e)}), 413
+
+    # Every chunk keeps an active upload alive
+    upload.expires_at = upload_expiry()
+    db_session.commit()
+    return jsonify({"index": index, "size": size})
+
+@entry_routes.route("/voice/uploads/<upload_id>/complete", methods=["POST"])
+@idempotent
+def complete_voice_upload(upload_id):
+    """Joins the chunks of an upload into a voice entry.
+
+    The body gives the expected ``chunks`` count; all of ``0..chunks-1``
+    must have arrived. Completing twice returns the entry created first.
+    """
+    upload = find_voice_upload(upload_id)
+    if upload is None:
+        return jsonify({"message": "Upload not found or expired"}), 404
+    if upload.entry_id is not None:
+        return jsonify({"message": "Voice note saved successfully", "id": upload.entry_id})
+
+    data = request.get_json(silent=True) or {}
+    count = data.get("chunks")
+    if not isinstance(count, int) or not 0 < count <= MAX_CHUNKS:
+        return jsonify({"message": "chunks must be the number of chunks sent"}), 400
+
+    chunks = get_chunk_store()
+    missing = sorted(set(range(count)) - set(chunks.received(upload.id)))
+    if missing:
+        return jsonify({"message": "Some chunks are missing", "missing": missing}), 409
+
+    with chunks.open_chunks(upload.id, count) as stream:
+        result, status = create_voice_entry(
+            upload.user_id, stream, upload.extension,
+            title=upload.title,
+            mood=upload.mood,
+            is_capsule=upload.is_capsule,
+            capsule_open_date=upload.capsule_open_date,
+            upload_id=upload.id
+        )
+    if status == 200:
+        # The row stays until it expires so a retried completion finds the entry
+        chunks.discard(upload_id)
+    return jsonify(result), status
+
+@entry_routes.route("/voice/uploads/<upload_id>", methods=["DELETE"])
+def cancel_voice_upload(upload_id):
+    """Abandons an upload and drops its chunks."""
+    upload = find_voice_upload(upload_id)
+    if upload is None:
+        return jsonify({"message": "Upload not found or expired"}), 404
+    db_session.delete(upload)
+    db_session.commit()
+    get_chunk_store().discard(upload_id)
+    return jsonify({"message": "Upload cancelled"})
+
+def find_voice_upload(upload_id):
+    if not UPLOAD_ID_PATTERN.match(upload_id):
+        return None
+    return db_session.query(VoiceUpload).filter(
+        VoiceUpload.id == upload_id, VoiceUpload.expires_at >= utcnow()
+    ).first()
+
+
+@entry_routes.route("/voice/stats/<int:user_id>", methods=["GET"])
+@user_version_etag
+def get_voice_stats(user_id):
+    """Summarises a user's voice notes with a single aggregate query."""
+    count, total_duration, total_bytes, capsules, days = db_session.query(
+        func.count(Entry.id),
+        func.coalesce(func.sum(Entry.audio_duration), 0),
+        func.coalesce(func.sum(Entry.audio_size), 0),
+        func.coalesce(func.sum(case((Entry.is_capsule.is_(True), 1), else_=0)), 0),
+        func.count(distinct(Entry.local_date))
+    ).filter(Entry.user_id == user_id, Entry.type == "voice").one()
+
+    return jsonify({
+        "total": count,
+        "total_duration": round(float(total_duration), 3),
+        "total_bytes": int(total_bytes),
+        "capsules": int(capsules),
+        "days_recorded": days
+    })
 
 @entry_routes.route("/generate-prompts", methods=["POST"])
 def generate_ai_prompts():
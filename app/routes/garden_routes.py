@@ -1,14 +1,15 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy.orm import selectinload
 from app.database.db import db_session
 from app.database.models import Garden, GardenFlower
+from app.database.versions import bump_data_version, get_user_timezone
+from app.database.timezones import utcnow, local_date, local_today, isoformat_utc
+from app.routes.http_cache import user_version_etag
+from app.routes.idempotency import idempotent
 import datetime
-from datetime import timezone, timedelta
 import json
 import random
 
-# IST timezone (UTC+5:30)
-IST = timezone(timedelta(hours=5, minutes=30))
-
 garden_routes = Blueprint("garden",__name__)
 
 # Mood to flower mapping
@@ -38,6 +39,7 @@ SEASONAL_THEMES = {
 }
 
 @garden_routes.route("/", methods=["POST"])
+@idempotent
 def log_mood_and_update_garden():
     """Logs a user's mood and updates their garden stats."""
     data = request.json
@@ -48,45 +50,66 @@ def log_mood_and_update_garden():
     if not user_id or not mood:
         return jsonify({"message": "user_id and mood are required fields"}), 400
 
-    garden = db_session.query(Garden).filter_by(user_id=user_id).first()
+    version = bump_data_version(user_id)
+    if version is None:
+        db_session.rollback()
+        return jsonify({"message": "User not found"}), 404
+
+    garden_delta = grow_garden(user_id, mood, intensity, version)
+    db_session.commit()
+    return jsonify({
+        "message": f"Mood '{mood}' logged, garden updated!",
+        **garden_delta
+    }), 200
+
+def grow_garden(user_id, mood, intensity, version):
+    """Grows the user's garden for a logged mood, without committing.
+
+    Entry creation calls this inside its own transaction so saving an entry
+    and growing the garden take one request. Returns the garden delta that
+    the /garden/ endpoint reports.
+    """
+    garden = db_session.query(Garden).options(
+        selectinload(Garden.flowers_data)
+    ).filter_by(user_id=user_id).first()
 
     if not garden:
         # Create a new garden if one doesn't exist
         garden = Garden(user_id=user_id, overall_vibe=mood)
         db_session.add(garden)
-        db_session.flush()  # Get the garden ID
+        db_session.flush()  # Apply column defaults
 
     # Update overall vibe
     garden.overall_vibe = mood
-    garden.last_updated = datetime.datetime.now(IST)
+    garden.last_updated = utcnow()
     garden.growth_level += 1
 
     # Find or create flower for this mood
     flower_type = MOOD_FLOWERS.get(mood.lower(), "dandelion")
-    flower = db_session.query(GardenFlower).filter_by(
-        garden_id=garden.id, mood_type=mood.lower()
-    ).first()
+    flower = next((f for f in garden.flowers_data if f.mood_type == mood.lower()), None)
 
     if not flower:
         # Create new flower
         flower = GardenFlower(
-            garden_id=garden.id,
             mood_type=mood.lower(),
             flower_type=flower_type,
+            growth_stage=0.0,
             position_x=random.uniform(15, 75),  # Keep away from UI elements
             position_y=random.uniform(20, 70)   # Account for stats panel at top and water level at bottom
         )
-        db_session.add(flower)
+        garden.flowers_data.append(flower)
     else:
         # Update existing flower growth
         growth_increase = intensity * 0.1  # Intensity affects growth rate
         flower.growth_stage = min(1.0, flower.growth_stage + growth_increase)
-        flower.last_growth = datetime.datetime.now(IST)
+        flower.last_growth = utcnow()
         if flower.growth_stage >= 1.0:
             flower.bloom_count += 1
 
+    flower.version = version
+
     # Update garden counters
-    garden.flowers = db_session.query(GardenFlower).filter_by(garden_id=garden.id).count()
+    garden.flowers = len(garden.flowers_data)
 
     # Check for achievements
     achievements = json.loads(garden.achievements or "[]")
@@ -96,18 +119,19 @@ def log_mood_and_update_garden():
         achievements.append("first_bloom")
     garden.achievements = json.dumps(achievements)
 
-    db_session.commit()
-    return jsonify({
-        "message": f"Mood '{mood}' logged, garden updated!",
+    return {
         "growth_level": garden.growth_level,
         "flowers": garden.flowers,
         "new_flower": flower.flower_type if flower.growth_stage < 0.1 else None
-    }), 200
+    }
 
 @garden_routes.route("/<int:user_id>", methods=["GET"])
+@user_version_etag
 def get_garden(user_id):
     try:
-        garden = db_session.query(Garden).filter_by(user_id=user_id).first()
+        garden = db_session.query(Garden).options(
+            selectinload(Garden.flowers_data)
+        ).filter_by(user_id=user_id).first()
         if not garden:
             # Create a new garden if one doesn't exist
             garden = Garden(
@@ -120,26 +144,15 @@ def get_garden(user_id):
                 achievements="[]"
             )
             db_session.add(garden)
+            if bump_data_version(user_id) is None:
+                db_session.rollback()
+                return jsonify({"message": "User not found"}), 404
             db_session.commit()
 
-        # Re-query to ensure relationships are loaded
-        garden = db_session.query(Garden).filter_by(user_id=user_id).first()
-
-        flowers = []
-        for flower in garden.flowers_data:
-            flowers.append({
-                "id": flower.id,
-                "mood_type": flower.mood_type,
-                "flower_type": flower.flower_type,
-                "growth_stage": float(flower.growth_stage),
-                "position_x": float(flower.position_x),
-                "position_y": float(flower.position_y),
-                "health": float(flower.health),
-                "bloom_count": flower.bloom_count
-            })
+        flowers = [serialize_flower(flower) for flower in garden.flowers_data]
 
         # Determine current season based on month
-        current_month = datetime.datetime.now(IST).month
+        current_month = local_today(get_user_timezone(user_id)).month
         if current_month in [12, 1, 2]:
             season = "winter"
         elif current_month in [3, 4, 5]:
@@ -162,7 +175,7 @@ def get_garden(user_id):
             "achievements": json.loads(garden.achievements or "[]"),
             "flowers_data": flowers,
             "seasonal_theme": SEASONAL_THEMES[season],
-            "last_updated": garden.last_updated.isoformat() if garden.last_updated else None
+            "last_updated": isoformat_utc(garden.last_updated)
         }
 
         return jsonify(response_data), 200
@@ -175,39 +188,64 @@ def get_garden(user_id):
         db_session.rollback()
         return jsonify({"error": "Failed to load garden", "details": str(e), "user_id": user_id}), 500
 
+def serialize_flower(flower):
+    """Converts a garden flower into its JSON representation."""
+    return {
+        "id": flower.id,
+        "mood_type": flower.mood_type,
+        "flower_type": flower.flower_type,
+        "growth_stage": float(flower.growth_stage),
+        "position_x": float(flower.position_x),
+        "position_y": float(flower.position_y),
+        "health": float(flower.health),
+        "bloom_count": flower.bloom_count
+    }
+
 @garden_routes.route("/water/<int:user_id>", methods=["POST"])
 def water_garden(user_id):
-    garden = db_session.query(Garden).filter_by(user_id=user_id).first()
+    garden = db_session.query(Garden).options(
+        selectinload(Garden.flowers_data)
+    ).filter_by(user_id=user_id).first()
     if not garden:
         return jsonify({"message": "Garden not found"}), 404
 
-    now = datetime.datetime.now(IST)
+    # "Today" is the calendar day in the user's time zone
+    zone = get_user_timezone(user_id)
+    today = local_today(zone)
+    last_watered_on = local_date(garden.last_watered, zone) if garden.last_watered else None
 
     # Check if already watered today
-    if garden.last_watered and garden.last_watered.date() == now.date():
+    if last_watered_on == today:
         return jsonify({"message": "Garden already watered today!", "already_watered": True}), 200
 
     # Water the garden
     garden.water_level = min(100, garden.water_level + 25)
-    garden.last_watered = now
+    garden.last_watered = utcnow()
     garden.total_waterings += 1
 
     # Update watering streak
-    if garden.last_watered and (now - garden.last_watered).days == 1:
+    if last_watered_on == today - datetime.timedelta(days=1):
         garden.watering_streak += 1
     else:
         garden.watering_streak = 1
 
+    version = bump_data_version(user_id)
+    if version is None:
+        db_session.rollback()
+        return jsonify({"message": "User not found"}), 404
+
     # Boost flower growth when watered
     rewards = []
     for flower in garden.flowers_data:
         if flower.health < 1.0:
             flower.health = min(1.0, flower.health + 0.1)
+            flower.version = version
             rewards.append(f"Health boost for {flower.flower_type}")
 
         if random.random() < 0.3:  # 30% chance for growth boost
             old_stage = flower.growth_stage
             flower.growth_stage = min(1.0, flower.growth_stage + 0.05)
+            flower.version = version
             if flower.growth_stage >= 1.0 and old_stage < 1.0:
                 rewards.append(f"{flower.flower_type} bloomed!")
                 flower.bloom_count += 1
@@ -234,6 +272,7 @@ def water_garden(user_id):
     }), 200
 
 @garden_routes.route("/achievements/<int:user_id>", methods=["GET"])
+@user_version_etag
 def get_achievements(user_id):
     garden = db_session.query(Garden).filter_by(user_id=user_id).first()
     if not garden:
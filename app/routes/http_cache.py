@@ -0,0 +1,36 @@
+from functools import wraps
+from flask import request, make_response
+from app.database.db import db_session
+from app.database.models import User
+from app.database.timezones import local_today
+
+
+def user_version_etag(view):
+    """Answers conditional GETs on a user-scoped view from the data version.
+
+    The ETag is derived from the user's data version plus the current date
+    in their time zone (streaks, "today" and seasons change with the day),
+    read in one primary-key lookup, so a matching
+    ``If-None-Match`` gets a 304 without running the view or touching the
+    entries table.
+    """
+    @wraps(view)
+    def wrapper(user_id, *args, **kwargs):
+        user = db_session.query(User.data_version, User.timezone).filter_by(id=user_id).first()
+        version, zone = user if user else (0, None)
+        etag = f"u{user_id}-v{version}-{local_today(zone).isoformat()}"
+
+        if request.if_none_match.contains_weak(etag):
+            response = make_response("", 304)
+        else:
+            response = make_response(view(user_id, *args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag, weak=True)
+        response.headers["Cache-Control"] = "private, no-cache"
+        # Views may negotiate the representation (e.g. NDJSON streaming)
+        response.vary.add("Accept")
+        return response
+
+    return wrapper
@@ -0,0 +1,125 @@
+import hashlib
+from functools import wraps
+from flask import request, jsonify, make_response, current_app
+from sqlalchemy.exc import IntegrityError
+from app.database.db import db_session
+from app.database.models import IdempotencyKey
+from app.database.timezones import utcnow
+from datetime import timedelta
+
+# How long a key's stored response is replayed
+IDEMPOTENCY_TTL = timedelta(hours=24)
+
+
+def idempotent(view):
+    """Makes a POST view safe to retry with an ``Idempotency-Key`` header.
+
+    The first request reserves the key and runs the view. Its response is
+    then stored and replayed verbatim to retries for IDEMPOTENCY_TTL, so
+    nothing is inserted twice. Keys are scoped to the user the request acts
+    for, and a key reused for a different request (another body or path)
+    gets a 422 instead of the stored response. A retry that arrives while
+    the first request is still running gets a 409. Server errors release
+    the key so the client can try again. Requests without the header are
+    not affected.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get("Idempotency-Key")
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > 255:
+            return jsonify({"message": "Idempotency-Key is too long"}), 400
+
+        fingerprint = request_fingerprint()
+        user_id = request_user_id()
+        now = utcnow()
+        db_session.query(IdempotencyKey).filter(
+            IdempotencyKey.expires_at < now
+        ).delete(synchronize_session=False)
+
+        record = IdempotencyKey(
+            key=key,
+            endpoint=request.endpoint,
+            user_id=user_id,
+            fingerprint=fingerprint,
+            created_at=now,
+            expires_at=now + IDEMPOTENCY_TTL
+        )
+        db_session.add(record)
+        try:
+            db_session.commit()
+        except IntegrityError:
+            db_session.rollback()
+            return replay(key, user_id, fingerprint)
+
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            release(record.id)
+            raise
+
+        if response.status_code >= 500:
+            release(record.id)
+            return response
+
+        record.status_code = response.status_code
+        record.response_body = response.get_data(as_text=True)
+        db_session.commit()
+        return response
+
+    return wrapper
+
+
+def request_fingerprint():
+    """Hashes what makes a retry the same request: method, path and body.
+
+    Form uploads are hashed field by field, file contents included, rather
+    than from the raw body so the form is still parsed for the view.
+    """
+    digest = hashlib.sha256(f"{request.method} {request.full_path}\n".encode())
+    if request.mimetype in ("multipart/form-data", "application/x-www-form-urlencoded"):
+        for name, value in sorted(request.form.items(multi=True)):
+            digest.update(f"{name}={value}\n".encode())
+        for name, file in sorted(request.files.items(multi=True), key=lambda item: item[0]):
+            digest.update(f"{name}:{file.filename}\n".encode())
+            for chunk in iter(lambda: file.stream.read(64 * 1024), b""):
+                digest.update(chunk)
+            file.stream.seek(0)
+    else:
+        digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+def request_user_id():
+    """The user a request acts for (URL, JSON or form ``user_id``), else 0."""
+    value = (request.view_args or {}).get("user_id")
+    if value is None:
+        data = request.get_json(silent=True)
+        value = data.get("user_id") if isinstance(data, dict) else request.form.get("user_id")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def replay(key, user_id, fingerprint):
+    """Answers a retry from the stored response for ``key``."""
+    record = db_session.query(IdempotencyKey).filter_by(
+        key=key, endpoint=request.endpoint, user_id=user_id
+    ).first()
+    if record is not None and record.fingerprint != fingerprint:
+        return jsonify({"message": "This Idempotency-Key was already used for a different request"}), 422
+    if record is None or record.status_code is None:
+        return jsonify({"message": "A request with this Idempotency-Key is already in progress"}), 409
+
+    response = current_app.response_class(record.response_body, status=record.status_code, mimetype="application/json")
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+def release(record_id):
+    """Forgets a reserved key after the request failed."""
+    db_session.rollback()
+    db_session.query(IdempotencyKey).filter_by(id=record_id).delete(synchronize_session=False)
+    db_session.commit()
@@ -0,0 +1,73 @@
+from flask import Blueprint, request, jsonify
+from sqlalchemy.orm import undefer
+from app.database.db import db_session
+from app.database.models import Entry, Todo, Garden, GardenFlower, SyncTombstone
+from app.database.versions import get_data_version
+from app.routes.entry_routes import serialize_entry
+from app.routes.garden_routes import serialize_flower
+from app.routes.todo_routes import serialize_todo
+
+sync_routes = Blueprint("sync", __name__)
+
+# Tombstone kinds and the response key listing their deleted ids
+TOMBSTONE_KEYS = {"entry": "entries", "todo": "todos", "flower": "flowers"}
+
+@sync_routes.route("/<int:user_id>", methods=["GET"])
+def sync_changes(user_id):
+    """Returns what changed for a user since a data version.
+
+    Clients keep the returned ``version`` and pass it back as ``since`` on
+    the next call; ``since=0`` (the default) returns everything, including
+    rows written before versions were tracked. Rows deleted in between are
+    listed under ``deleted`` as ``{"id", "version"}``. Every row carries its
+    ``version`` too: ids can be reused after a delete, and the higher
+    version is what happened last. A deletion already superseded by a
+    returned row with the same id is left out.
+    """
+    try:
+        since = int(request.args.get("since", 0))
+        if since < 0:
+            raise ValueError
+    except ValueError:
+        return jsonify({"message": "since must be a non-negative integer"}), 400
+
+    # Read the version first so nothing written after it can be missed
+    version = get_data_version(user_id)
+    if version is None:
+        return jsonify({"message": "User not found"}), 404
+
+    # Rows from before versions were tracked all have version 0
+    entries = db_session.query(Entry).options(undefer(Entry.content)).filter(
+        Entry.user_id == user_id, *([Entry.version > since] if since else [])
+    ).order_by(Entry.version).all()
+
+    todos = db_session.query(Todo).filter(
+        Todo.user_id == user_id, *([Todo.version > since] if since else [])
+    ).order_by(Todo.version).all()
+
+    flowers = db_session.query(GardenFlower).join(Garden).filter(
+        Garden.user_id == user_id, *([GardenFlower.version > since] if since else [])
+    ).order_by(GardenFlower.version).all()
+
+    changed = {
+        "entries": [dict(serialize_entry(entry), version=entry.version) for entry in entries],
+        "todos": [dict(serialize_todo(todo), version=todo.version) for todo in todos],
+        "flowers": [dict(serialize_flower(flower), version=flower.version) for flower in flowers]
+    }
+
+    deleted = {key: [] for key in TOMBSTONE_KEYS.values()}
+    if since:
+        tombstones = db_session.query(SyncTombstone.kind, SyncTombstone.object_id, SyncTombstone.version).filter(
+            SyncTombstone.user_id == user_id, SyncTombstone.version > since
+        ).order_by(SyncTombstone.version).all()
+        for key in deleted:
+            # Latest deletion per id, unless the id was written again after it
+            latest = {object_id: tombstone_version for kind, object_id, tombstone_version in tombstones
+                      if TOMBSTONE_KEYS[kind] == key}
+            for row in changed[key]:
+                if row["version"] > latest.get(row["id"], row["version"]):
+                    del latest[row["id"]]
+            deleted[key] = [{"id": object_id, "version": tombstone_version}
+                            for object_id, tombstone_version in latest.items()]
+
+    return jsonify(dict(changed, version=version, deleted=deleted))
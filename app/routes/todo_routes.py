@@ -1,31 +1,38 @@
 from flask import Blueprint, request, jsonify
 from app.database.db import db_session
 from app.database.models import Todo
-from datetime import datetime, timezone, timedelta
-
-# IST timezone (UTC+5:30)
-IST = timezone(timedelta(hours=5, minutes=30))
+from app.database.versions import bump_data_version, record_tombstone, get_user_timezone
+from app.database.timezones import get_zone, isoformat_utc
+from app.routes.http_cache import user_version_etag
+from app.routes.idempotency import idempotent
+from datetime import datetime
 
 todo_routes = Blueprint("todo", __name__)
 
 @todo_routes.route("/user/<int:user_id>", methods=["GET"])
+@user_version_etag
 def get_todos(user_id):
     """Get all todos for a user."""
     todos = db_session.query(Todo).filter_by(user_id=user_id).order_by(Todo.created_at.desc()).all()
-    result = [{
+    return jsonify([serialize_todo(todo) for todo in todos])
+
+def serialize_todo(todo):
+    """Converts a todo into its JSON representation."""
+    return {
         "id": todo.id,
         "title": todo.title,
         "description": todo.description,
         "completed": todo.completed,
         "priority": todo.priority,
         "category": todo.category,
+        # Due dates are the wall time the user picked, not an instant
         "due_date": todo.due_date.isoformat() if todo.due_date else None,
-        "created_at": todo.created_at.isoformat(),
-        "updated_at": todo.updated_at.isoformat()
-    } for todo in todos]
-    return jsonify(result)
+        "created_at": isoformat_utc(todo.created_at),
+        "updated_at": isoformat_utc(todo.updated_at)
+    }
 
 @todo_routes.route("/add", methods=["POST"])
+@idempotent
 def add_todo():
     """Add a new todo item."""
     data = request.json
@@ -46,13 +53,19 @@ def add_todo():
         except ValueError:
             return jsonify({"message": "Invalid due date format"}), 400
 
+    version = bump_data_version(user_id)
+    if version is None:
+        db_session.rollback()
+        return jsonify({"message": "User not found"}), 404
+
     new_todo = Todo(
         user_id=user_id,
         title=title,
         description=description,
         priority=priority,
         category=category,
-        due_date=due_date
+        due_date=due_date,
+        version=version
     )
     db_session.add(new_todo)
     db_session.commit()
@@ -89,6 +102,7 @@ def update_todo(todo_id):
         else:
             todo.due_date = None
 
+    todo.version = bump_data_version(todo.user_id)
     db_session.commit()
     return jsonify({"message": "Todo updated successfully"}), 200
 
@@ -99,13 +113,19 @@ def delete_todo(todo_id):
     if not todo:
         return jsonify({"message": "Todo not found"}), 404
 
+    version = bump_data_version(todo.user_id)
+    record_tombstone(todo.user_id, "todo", todo.id, version)
     db_session.delete(todo)
     db_session.commit()
     return jsonify({"message": "Todo deleted successfully"}), 200
 
 @todo_routes.route("/stats/<int:user_id>", methods=["GET"])
 def get_todo_stats(user_id):
-    """Get todo statistics for a user."""
+    """Get todo statistics for a user.
+
+    Not ETag-cached: the overdue count changes as due dates pass, without
+    any write that would bump the data version.
+    """
     todos = db_session.query(Todo).filter_by(user_id=user_id).all()
 
     total = len(todos)
@@ -118,7 +138,7 @@ def get_todo_stats(user_id):
     low_priority = len([t for t in todos if t.priority == "low" and not t.completed])
 
     # Overdue todos
-    now = datetime.now(IST)
+    now = datetime.now(get_zone(get_user_timezone(user_id))).replace(tzinfo=None)
     overdue = len([t for t in todos if t.due_date and t.due_date < now and not t.completed])
 
     return jsonify({
@@ -63,6 +63,49 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     };
 
+    // --- Voice uploads ---
+    // Small recordings go up in one request; longer ones use the resumable
+    // protocol so a dropped connection only re-sends the missing chunks.
+    const RESUMABLE_UPLOAD_THRESHOLD = 2 * 1024 * 1024;
+
+    async function uploadVoiceNote(blob, filename, fields) {
+        if (blob.size <= RESUMABLE_UPLOAD_THRESHOLD) {
+            const formData = new FormData();
+            formData.append('audio', blob, filename);
+            Object.entries(fields).forEach(([key, value]) => formData.append(key, value));
+            return api.post('/entries/voice', formData, true);
+        }
+
+        const upload = await api.post('/entries/voice/uploads', { ...fields, filename });
+        const base = `/entries/voice/uploads/${upload.upload_id}`;
+        const chunkCount = Math.ceil(blob.size / upload.chunk_size);
+
+        for (let attempt = 0; attempt < 5; attempt++) {
+            try {
+                const status = await api.get(base);
+                const received = new Set(status.received);
+                for (let index = 0; index < chunkCount; index++) {
+                    if (received.has(index)) continue;
+                    const chunk = blob.slice(index * upload.chunk_size, (index + 1) * upload.chunk_size);
+                    const res = await fetch(`${base}/chunks/${index}`, { method: 'PUT', body: chunk });
+                    if (!res.ok) throw new Error(`Chunk ${index} failed`);
+                }
+                const res = await fetch(`${base}/complete`, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json', 'Idempotency-Key': upload.upload_id },
+                    body: JSON.stringify({ chunks: chunkCount })
+                });
+                if (res.ok) return res.json();
+                if (res.status < 500 && res.status !== 409) throw Object.assign(new Error('Upload rejected'), { fatal: true });
+            } catch (err) {
+                if (err.fatal) throw err;
+                console.warn(`Voice note: upload attempt ${attempt + 1} failed, resuming`, err);
+            }
+            await new Promise(resolve => setTimeout(resolve, 1000 * 2 ** attempt));
+        }
+        throw new Error('Upload failed');
+    }
+
     // --- Setup ---
     const content = document.getElementById("content");
     const userId = localStorage.getItem("userId");
@@ -188,8 +231,7 @@ document.addEventListener('DOMContentLoaded', () => {
     // --- Export Functions ---
     async function exportJournal() {
         try {
-            const entries = await api.get(`/entries/user/${userId}`);
-            const textEntries = entries.filter(e => e.type === 'text');
+            const textEntries = await api.get(`/entries/user/${userId}?type=text`);
 
             // Initialize jsPDF
             const { jsPDF } = window.jspdf;
@@ -623,13 +665,12 @@ document.addEventListener('DOMContentLoaded', () => {
     async function loadRecentEntries() {
         const listEl = document.getElementById('recent-entries-list');
         try {
-            const entries = await api.get(`/entries/user/${userId}`);
+            const { entries: textEntries } = await api.get(`/entries/user/${userId}?type=text&limit=3&fields=title,created_at`);
             listEl.innerHTML = '';
-            const textEntries = entries.filter(e => e.type === 'text');
             if (textEntries.length === 0) {
                 listEl.innerHTML = '<p>No journal entries yet.</p>';
             } else {
-                textEntries.slice(0, 3).forEach(entry => {
+                textEntries.forEach(entry => {
                     const entryEl = document.createElement('div');
                     entryEl.className = 'recent-entry';
                     entryEl.innerHTML = `
@@ -859,7 +900,7 @@ document.addEventListener('DOMContentLoaded', () => {
     async function loadJournalStats() {
         const statsEl = document.getElementById('journalStats');
         try {
-            const entries = await api.get(`/entries/user/${userId}`);
+            const entries = await api.get(`/entries/user/${userId}?fields=type,created_at`);
             const todayStr = toIST(new Date()).toLocaleDateString("en-CA");
             const todayEntries = entries.filter(e => toIST(new Date(e.created_at)).toLocaleDateString("en-CA") === todayStr);
             const totalEntries = entries.length;
@@ -921,7 +962,7 @@ document.addEventListener('DOMContentLoaded', () => {
             exportJournal();
         });
 
-        fetch(`/entries/user/${userId}`)
+        fetch(`/entries/user/${userId}?type=text`)
             .then(res => res.json())
             .then(entries => {
                 const container = document.getElementById("journalContainer");
@@ -1285,6 +1326,7 @@ document.addEventListener('DOMContentLoaded', () => {
                         };
 
                         try {
+                            // The server grows the mood garden in the same request
                             await api.post("/entries/add", payload);
 
                             // Clear draft after successful save
@@ -1293,21 +1335,14 @@ document.addEventListener('DOMContentLoaded', () => {
                             const msg = document.getElementById("saveMsg");
                             msg.classList.remove("hidden");
 
-                            // Update the mood garden with the new entry
-                            try {
-                                await api.post("/garden/", {
-                                    user_id: userId,
-                                    mood: mood,
-                                    intensity: 1.0
-                                });
-
-                                // If mood garden is currently open, refresh it to show new flower
-                                if (moodGardenInstance) {
+                            // If mood garden is currently open, refresh it to show new flower
+                            if (moodGardenInstance) {
+                                try {
                                     await moodGardenInstance.loadGarden();
                                     showNotification('🌸 New flower bloomed in your garden!', 'success');
+                                } catch (gardenErr) {
+                                    console.error("Garden refresh failed:", gardenErr);
                                 }
-                            } catch (gardenErr) {
-                                console.error("Garden update failed:", gardenErr);
                             }
                             // Generate compassionate response tools based on user's selected mood
                             try {
@@ -1411,8 +1446,8 @@ document.addEventListener('DOMContentLoaded', () => {
                 <h3>${entry.title}</h3>
                 <time>${formatTimeIST(entry.created_at)}</time>
               </div>
-              <audio controls style="width:100%;">
-                <source src="data:audio/webm;base64,${entry.audio_data}" type="audio/webm">
+              <audio controls preload="none" style="width:100%;">
+                <source src="${entry.audio_url}" type="audio/webm">
               </audio>
               <div class="entry-footer">
                 <span class="mood-tag">${entry.mood || "Neutral"}</span>
@@ -1535,25 +1570,27 @@ document.addEventListener('DOMContentLoaded', () => {
         async function loadVoiceStats() {
             const statsEl = document.getElementById('voiceStats');
             try {
-                const entries = await api.get(`/entries/user/${userId}`);
-                const voiceEntries = entries.filter(e => e.type === 'voice');
-                const totalVoice = voiceEntries.length;
-                const capsules = voiceEntries.filter(e => e.is_capsule).length;
+                const stats = await api.get(`/entries/voice/stats/${userId}`);
+                const totalMinutes = Math.round(stats.total_duration / 60);
 
                 statsEl.innerHTML = `
                     <div class="voice-stats-card">
                         <div class="stat-item">
-                            <span class="stat-number">${totalVoice}</span>
+                            <span class="stat-number">${stats.total}</span>
                             <span class="stat-label">Voice Notes</span>
                         </div>
                         <div class="stat-item">
-                            <span class="stat-number">${capsules}</span>
+                            <span class="stat-number">${stats.capsules}</span>
                             <span class="stat-label">Time Capsules</span>
                         </div>
                         <div class="stat-item">
-                            <span class="stat-number">${new Set(voiceEntries.map(e => new Date(e.created_at).toDateString())).size}</span>
+                            <span class="stat-number">${stats.days_recorded}</span>
                             <span class="stat-label">Days Recorded</span>
                         </div>
+                        <div class="stat-item">
+                            <span class="stat-number">${totalMinutes}</span>
+                            <span class="stat-label">Minutes Recorded</span>
+                        </div>
                     </div>
                 `;
             } catch {
@@ -1813,36 +1850,30 @@ document.addEventListener('DOMContentLoaded', () => {
                 fileExtension = 'ogg';
             }
 
-            const formData = new FormData();
-            formData.append('audio', lastBlob, `voice.${fileExtension}`);
-            formData.append('user_id', userId);
-            formData.append('title', 'Voice Note');
-            formData.append('mood', 'Neutral'); // or prompt for mood
-            console.log("Voice note: FormData prepared, blob size:", lastBlob.size, "type:", lastBlob.type);
+            const fields = {
+                user_id: userId,
+                title: 'Voice Note',
+                mood: 'Neutral' // or prompt for mood
+            };
+            console.log("Voice note: Upload prepared, blob size:", lastBlob.size, "type:", lastBlob.type);
 
             voiceStatus.textContent = "💾 Saving to server...";
             saveBtn.disabled = true;
 
             try {
-                console.log("Voice note: Sending POST request to /entries/voice");
-                await api.post('/entries/voice', formData, true);
+                console.log("Voice note: Uploading to server");
+                // The server grows the mood garden in the same request
+                await uploadVoiceNote(lastBlob, `voice.${fileExtension}`, fields);
                 console.log("Voice note: Save request successful");
 
-                // Update the mood garden with the voice note
-                try {
-                    await api.post("/garden/", {
-                        user_id: userId,
-                        mood: 'Neutral',
-                        intensity: 0.8  // Slightly less intense than text entries
-                    });
-
-                    // If mood garden is currently open, refresh it to show new flower
-                    if (moodGardenInstance) {
+                // If mood garden is currently open, refresh it to show new flower
+                if (moodGardenInstance) {
+                    try {
                         await moodGardenInstance.loadGarden();
                         showNotification('🌼 New flower grew in your garden!', 'success');
+                    } catch (gardenErr) {
+                        console.error("Garden refresh failed:", gardenErr);
                     }
-                } catch (gardenErr) {
-                    console.error("Garden update failed:", gardenErr);
                 }
 
                 voiceStatus.textContent = "✅ Saved to server!";
@@ -1890,16 +1921,16 @@ document.addEventListener('DOMContentLoaded', () => {
             const dtInput = document.getElementById("capsuleDateTime").value;
             if (!dtInput || !lastBlob) return alert("Please set a date and record something!");
 
-            const formData = new FormData();
-            formData.append('audio', lastBlob, 'voice.webm');
-            formData.append('user_id', userId);
-            formData.append('title', 'Voice Capsule');
-            formData.append('mood', 'Neutral');
-            formData.append('is_capsule', 'true');
-            formData.append('capsule_open_date', dtInput);
+            const fields = {
+                user_id: userId,
+                title: 'Voice Capsule',
+                mood: 'Neutral',
+                is_capsule: 'true',
+                capsule_open_date: dtInput
+            };
 
             try {
-                await api.post('/entries/voice', formData, true);
+                await uploadVoiceNote(lastBlob, 'voice.webm', fields);
                 loadVoiceStats();
                 renderRecordings();
                 modal.classList.remove("show");
@@ -1925,10 +1956,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
             try {
                 console.log("Voice note: Fetching entries for user", userId);
-                const entries = await api.get(`/entries/user/${userId}`);
-                console.log("Voice note: Total entries received:", entries.length);
-
-                const voiceEntries = entries.filter(e => e.type === 'voice');
+                const voiceEntries = await api.get(`/entries/user/${userId}?type=voice`);
                 console.log("Voice note: Voice entries found:", voiceEntries.length);
 
                 const now = new Date();
@@ -1978,10 +2006,11 @@ document.addEventListener('DOMContentLoaded', () => {
                             audio.controls = true;
                             audio.preload = "metadata";
 
-                            if (entry.audio_data) {
-                                audio.src = `data:audio/webm;base64,${entry.audio_data}`;
+                            if (entry.audio_url) {
+                                audio.src = entry.audio_url;
                             }
 
+                            appendWaveformThumbnail(audioContainer, entry.waveform);
                             audioContainer.appendChild(audio);
                             wrapper.appendChild(audioContainer);
                         }
@@ -1999,8 +2028,8 @@ document.addEventListener('DOMContentLoaded', () => {
                         audio.controls = true;
                         audio.preload = "metadata";
 
-                        if (entry.audio_data) {
-                            audio.src = `data:audio/webm;base64,${entry.audio_data}`;
+                        if (entry.audio_url) {
+                            audio.src = entry.audio_url;
                         }
 
                         audio.addEventListener('error', (e) => {
@@ -2016,6 +2045,7 @@ document.addEventListener('DOMContentLoaded', () => {
                             console.log("Voice note: Audio loading started");
                         });
 
+                        appendWaveformThumbnail(audioContainer, entry.waveform);
                         audioContainer.appendChild(audio);
                         wrapper.appendChild(audioContainer);
                     }
@@ -2033,6 +2063,28 @@ document.addEventListener('DOMContentLoaded', () => {
         }
 
 
+        // Draws the server-computed peaks (base64, one byte per bar) without loading any audio
+        function appendWaveformThumbnail(container, waveform) {
+            if (!waveform) return;
+            const peaks = Uint8Array.from(atob(waveform), c => c.charCodeAt(0));
+            const thumb = document.createElement("canvas");
+            thumb.classList.add("waveform-thumbnail");
+            thumb.width = 256;
+            thumb.height = 40;
+            thumb.style.width = "100%";
+            thumb.style.height = "40px";
+
+            const thumbCtx = thumb.getContext("2d");
+            const barWidth = thumb.width / peaks.length;
+            const middle = thumb.height / 2;
+            thumbCtx.fillStyle = "#667eea";
+            peaks.forEach((peak, i) => {
+                const barHeight = Math.max(1, (peak / 127) * thumb.height);
+                thumbCtx.fillRect(i * barWidth, middle - barHeight / 2, Math.max(1, barWidth), barHeight);
+            });
+            container.appendChild(thumb);
+        }
+
         async function deleteRecording(entryId) {
             if (confirm('Delete this recording?')) {
                 try {
@@ -0,0 +1,41 @@
+from flask import current_app
+from .base import AudioStorage, copy_in_chunks
+from .local import LocalAudioStorage
+from .s3 import S3AudioStorage
+from .resumable import ChunkStore
+
+
+def create_audio_storage(config):
+    """Builds the audio storage backend selected by ``AUDIO_STORAGE``.
+
+    ``local`` (the default) keeps files in UPLOAD_FOLDER; ``s3`` uses the
+    ``AUDIO_S3_*`` settings and suits serverless deployments where local
+    disk does not persist.
+    """
+    backend = config.get("AUDIO_STORAGE", "local")
+    if backend == "local":
+        return LocalAudioStorage(config["UPLOAD_FOLDER"])
+    if backend == "s3":
+        if not config.get("AUDIO_S3_BUCKET"):
+            raise RuntimeError("AUDIO_S3_BUCKET must be set when AUDIO_STORAGE=s3")
+        return S3AudioStorage(
+            config["AUDIO_S3_BUCKET"],
+            prefix=config.get("AUDIO_S3_PREFIX") or "",
+            endpoint_url=config.get("AUDIO_S3_ENDPOINT_URL"),
+            region_name=config.get("AUDIO_S3_REGION")
+        )
+    raise RuntimeError(f"Unknown AUDIO_STORAGE backend: {backend}")
+
+
+def get_audio_storage():
+    """Returns the current app's audio storage, creating it on first use."""
+    if "audio_storage" not in current_app.extensions:
+        current_app.extensions["audio_storage"] = create_audio_storage(current_app.config)
+    return current_app.extensions["audio_storage"]
+
+
+def get_chunk_store():
+    """Returns the current app's store for resumable upload chunks."""
+    if "voice_chunks" not in current_app.extensions:
+        current_app.extensions["voice_chunks"] = ChunkStore(current_app.config["RESUMABLE_UPLOAD_FOLDER"])
+    return current_app.extensions["voice_chunks"]
@@ -0,0 +1,93 @@
+import hashlib
+
+# Recordings are copied in pieces of this size, never read whole
+CHUNK_SIZE = 64 * 1024
+
+
+class AudioStorage:
+    """Where voice-note recordings live, addressed by a string key.
+
+    Keys are plain file names (e.g. ``voice_3_1759407289.97.webm``), which
+    is also what ``Entry.audio_path`` stores.
+    """
+
+    def save(self, stream, key):
+        """Stores everything readable from ``stream`` under ``key``.
+
+        Returns ``(size, sha256_hex)``, computed while copying.
+        """
+        raise NotImplementedError
+
+    def open(self, key):
+        """Returns a binary file object for reading ``key``."""
+        raise NotImplementedError
+
+    def delete(self, key):
+        """Removes ``key``; missing keys are ignored."""
+        raise NotImplementedError
+
+    def exists(self, key):
+        raise NotImplementedError
+
+    def move(self, source_key, target_key):
+        """Renames ``source_key`` to ``target_key``, replacing any existing object.
+
+        Backends override this with a cheaper native rename or copy.
+        """
+        with self.open(source_key) as source:
+            self.save(source, target_key)
+        self.delete(source_key)
+
+    def iter_keys(self):
+        """Yields ``(key, size, modified_timestamp)`` for every stored object.
+
+        Listing is incremental, so huge stores are never held in memory.
+        """
+        raise NotImplementedError
+
+    def local_path(self, key):
+        """Filesystem path for ``key`` when stored on local disk, else None."""
+        return None
+
+    def url(self, key, expires_in=3600):
+        """Time-limited direct download URL for ``key``, if supported."""
+        return None
+
+
+def check_key(key):
+    """Rejects keys that could escape the storage root."""
+    if not key or "/" in key or "\\" in key or key in (".", ".."):
+        raise ValueError(f"Invalid audio key: {key!r}")
+    return key
+
+
+class HashingReader:
+    """Wraps a binary stream, hashing and counting bytes as they are read."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size=-1):
+        chunk = self.stream.read(size)
+        self.digest.update(chunk)
+        self.size += len(chunk)
+        return chunk
+
+    def hexdigest(self):
+        return self.digest.hexdigest()
+
+
+def copy_in_chunks(source, target):
+    """Copies ``source`` into ``target`` CHUNK_SIZE bytes at a time.
+
+    Returns ``(size, sha256_hex)`` of the copied data.
+    """
+    reader = HashingReader(source)
+    while True:
+        chunk = reader.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        target.write(chunk)
+    return reader.size, reader.hexdigest()
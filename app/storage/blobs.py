@@ -0,0 +1,134 @@
+import uuid
+from datetime import timedelta
+from sqlalchemy import update, delete
+from sqlalchemy.exc import IntegrityError
+from app.database.db import db_session
+from app.database.timezones import utcnow
+from app.database.models import AudioBlob
+
+# Unreferenced blobs are kept this long before garbage collection removes them
+GC_GRACE_PERIOD = timedelta(hours=24)
+
+
+def blob_key(sha256, extension):
+    return f"blob_{sha256}{extension}"
+
+
+def store_audio(storage, stream, extension):
+    """Stores a recording under its content hash and takes a reference to it.
+
+    The upload is streamed to a temporary key first, since its hash is only
+    known once it has been read. If a blob with the same content already
+    exists the copy is dropped and the existing blob's ``ref_count`` goes
+    up instead. The reference belongs to the current transaction, so it
+    disappears on rollback.
+
+    Returns ``(key, size, sha256, created)``; ``created`` is True when this
+    call added a new blob, which the caller should delete if its
+    transaction fails (see ``discard_audio``).
+    """
+    temp_key = f"incoming_{uuid.uuid4().hex}{extension}"
+    size, sha256 = storage.save(stream, temp_key)
+    try:
+        key, created = acquire_blob(sha256, size, extension)
+        if created or not storage.exists(key):
+            storage.move(temp_key, key)
+        else:
+            storage.delete(temp_key)
+    except Exception:
+        storage.delete(temp_key)
+        raise
+    return key, size, sha256, created
+
+
+def acquire_blob(sha256, size, extension):
+    """Adds a reference to the blob with this hash, creating its row if needed.
+
+    Returns ``(key, created)``.
+    """
+    for _ in range(2):
+        result = db_session.execute(
+            update(AudioBlob).where(AudioBlob.sha256 == sha256).values(
+                ref_count=AudioBlob.ref_count + 1, released_at=None
+            )
+        )
+        if result.rowcount:
+            return db_session.query(AudioBlob.key).filter_by(sha256=sha256).scalar(), False
+
+        blob = AudioBlob(sha256=sha256, key=blob_key(sha256, extension), size=size, ref_count=1)
+        try:
+            # A concurrent upload of the same bytes may insert first; retry as a reference
+            with db_session.begin_nested():
+                db_session.add(blob)
+        except IntegrityError:
+            continue
+        return blob.key, True
+    raise RuntimeError(f"Could not reference audio blob {sha256}")
+
+
+def discard_audio(storage, key, created):
+    """Cleans up after ``store_audio`` when the entry could not be saved.
+
+    Call this before rolling back: the uncommitted blob row still holds its
+    hash, so no concurrent upload can start using the object being deleted.
+    """
+    if created:
+        storage.delete(key)
+    db_session.rollback()
+
+
+def release_audio(audio_path):
+    """Drops one reference to the blob stored at ``audio_path``.
+
+    Returns False when ``audio_path`` is not a blob (inline BLOBs and
+    recordings saved before deduplication), so the caller still owns it.
+    Blobs reaching zero references are removed later by ``collect_garbage``.
+    """
+    if not audio_path:
+        return False
+    result = db_session.execute(
+        update(AudioBlob).where(AudioBlob.key == audio_path, AudioBlob.ref_count > 0).values(
+            ref_count=AudioBlob.ref_count - 1, released_at=utcnow()
+        )
+    )
+    return result.rowcount > 0
+
+
+def collect_garbage(storage, grace_period=GC_GRACE_PERIOD, dry_run=False):
+    """Deletes blobs that have had no references for ``grace_period``.
+
+    Each blob is removed in its own transaction: the row is deleted only if
+    it is still unreferenced, and the object is deleted before the commit,
+    so an upload of the same bytes either re-references the row first or
+    waits and then stores a fresh copy.
+
+    Returns ``(blobs, bytes)`` reclaimed (or reclaimable, with ``dry_run``).
+    """
+    cutoff = utcnow() - grace_period
+    candidates = db_session.query(AudioBlob.id, AudioBlob.key, AudioBlob.size).filter(
+        AudioBlob.ref_count <= 0, AudioBlob.released_at < cutoff
+    ).order_by(AudioBlob.id).all()
+    db_session.rollback()
+
+    blobs = reclaimed = 0
+    for blob_id, key, size in candidates:
+        if dry_run:
+            blobs += 1
+            reclaimed += size
+            continue
+
+        result = db_session.execute(
+            delete(AudioBlob).where(AudioBlob.id == blob_id, AudioBlob.ref_count <= 0)
+        )
+        if not result.rowcount:
+            db_session.rollback()
+            continue
+        try:
+            storage.delete(key)
+        except Exception:
+            db_session.rollback()
+            raise
+        db_session.commit()
+        blobs += 1
+        reclaimed += size
+    return blobs, reclaimed
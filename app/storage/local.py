@@ -0,0 +1,58 @@
+import os
+from .base import AudioStorage, check_key, copy_in_chunks
+
+
+class LocalAudioStorage(AudioStorage):
+    """Stores recordings as files in one directory (e.g. UPLOAD_FOLDER).
+
+    Also the stand-in for tests: point it at a temporary directory.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.root, check_key(key))
+
+    def save(self, stream, key):
+        # Write under a temporary name so readers never see a partial file
+        path = self.path(key)
+        partial_path = path + ".part"
+        try:
+            with open(partial_path, "wb") as out:
+                size, sha256 = copy_in_chunks(stream, out)
+            os.replace(partial_path, path)
+        except OSError:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+        return size, sha256
+
+    def open(self, key):
+        return open(self.path(key), "rb")
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def move(self, source_key, target_key):
+        os.replace(self.path(source_key), self.path(target_key))
+        # The age of an object counts from when it arrived under its key
+        os.utime(self.path(target_key))
+
+    def exists(self, key):
+        return os.path.isfile(self.path(key))
+
+    def iter_keys(self):
+        # Subdirectories (e.g. resumable upload chunks) are not audio objects
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    stat = entry.stat()
+                    yield entry.name, stat.st_size, stat.st_mtime
+
+    def local_path(self, key):
+        return self.path(key)
@@ -0,0 +1,87 @@
+import os
+import time
+from datetime import timedelta
+from app.database.db import db_session
+from app.database.models import Entry, AudioBlob
+
+# Objects newer than this are left alone: they may belong to an upload whose
+# transaction has not committed yet
+MIN_ORPHAN_AGE = timedelta(hours=1)
+
+# Quarantined objects are renamed with this prefix and deleted later
+QUARANTINE_PREFIX = "quarantine_"
+
+# Old rows stored audio_path as a static path rather than a bare key, with
+# or without the leading slash; the key is the file name either way
+LEGACY_PATH_PREFIXES = ("/static/uploads/", "static/uploads/")
+
+
+def reconcile_storage(storage, batch_size=500, min_age=MIN_ORPHAN_AGE, delete=False, dry_run=False):
+    """Finds stored audio that no entry or blob row refers to.
+
+    Objects are listed incrementally and checked against the database one
+    batch at a time, so neither side is loaded whole. Orphans older than
+    ``min_age`` are renamed to ``quarantine_<key>`` (or deleted outright with
+    ``delete``), to be removed for good by ``purge_quarantine``.
+
+    Returns ``{"scanned", "orphans", "orphan_bytes"}``.
+    """
+    cutoff = time.time() - min_age.total_seconds()
+    stats = {"scanned": 0, "orphans": 0, "orphan_bytes": 0}
+    batch = {}
+
+    for key, size, modified in storage.iter_keys():
+        stats["scanned"] += 1
+        if key.startswith(QUARANTINE_PREFIX) or modified > cutoff:
+            continue
+        batch[key] = size
+        if len(batch) >= batch_size:
+            handle_orphans(storage, batch, stats, delete, dry_run)
+            batch = {}
+    if batch:
+        handle_orphans(storage, batch, stats, delete, dry_run)
+    return stats
+
+
+def handle_orphans(storage, batch, stats, delete, dry_run):
+    referenced = find_referenced_keys(list(batch))
+    for key, size in batch.items():
+        if key in referenced:
+            continue
+        stats["orphans"] += 1
+        stats["orphan_bytes"] += size
+        if dry_run:
+            continue
+        if delete:
+            storage.delete(key)
+        else:
+            storage.move(key, QUARANTINE_PREFIX + key)
+
+
+def find_referenced_keys(keys):
+    """Returns the subset of ``keys`` still used by an entry or a blob row."""
+    paths = keys + [prefix + key for prefix in LEGACY_PATH_PREFIXES for key in keys]
+    referenced = {
+        os.path.basename(path)
+        for (path,) in db_session.query(Entry.audio_path).filter(Entry.audio_path.in_(paths))
+    }
+    referenced.update(key for (key,) in db_session.query(AudioBlob.key).filter(AudioBlob.key.in_(keys)))
+    db_session.rollback()
+    return referenced
+
+
+def purge_quarantine(storage, max_age, dry_run=False):
+    """Deletes quarantined objects older than ``max_age``.
+
+    Returns ``(count, bytes)``.
+    """
+    cutoff = time.time() - max_age.total_seconds()
+    count = freed = 0
+    for key, size, modified in storage.iter_keys():
+        if not key.startswith(QUARANTINE_PREFIX) or modified > cutoff:
+            continue
+        if not dry_run:
+            storage.delete(key)
+        count += 1
+        freed += size
+    return count, freed
@@ -0,0 +1,162 @@
+import os
+import re
+import shutil
+import time
+from datetime import timedelta
+from app.database.db import db_session
+from app.database.timezones import utcnow
+from app.database.models import VoiceUpload
+from .base import CHUNK_SIZE
+
+# Unfinished uploads (and their chunks) are swept after this long without a new chunk
+UPLOAD_TTL = timedelta(hours=24)
+
+# Chunk size suggested to clients, and the largest accepted. Both stay
+# below the 4.5 MB request body limit of serverless hosts such as Vercel.
+DEFAULT_CHUNK_SIZE = 2 * 1024 * 1024
+MAX_CHUNK_SIZE = 4 * 1024 * 1024
+MAX_CHUNKS = 1000
+
+UPLOAD_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class ChunkTooLarge(ValueError):
+    pass
+
+
+class ChunkStore:
+    """Keeps the chunks of resumable uploads on local disk.
+
+    Each upload gets a directory named after its id holding ``<index>.part``
+    files. Chunks are written under a temporary name and renamed into place,
+    so a re-sent chunk simply replaces the old one.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, upload_id):
+        if not UPLOAD_ID_PATTERN.match(upload_id):
+            raise ValueError(f"Invalid upload id: {upload_id!r}")
+        return os.path.join(self.root, upload_id)
+
+    def chunk_path(self, upload_id, index):
+        return os.path.join(self.path(upload_id), f"{index}.part")
+
+    def write_chunk(self, upload_id, index, stream, max_size=MAX_CHUNK_SIZE):
+        """Streams one chunk to disk and returns its size.
+
+        Raises ChunkTooLarge (and keeps nothing) past ``max_size`` bytes.
+        """
+        os.makedirs(self.path(upload_id), exist_ok=True)
+        path = self.chunk_path(upload_id, index)
+        partial_path = f"{path}.{os.getpid()}.tmp"
+        size = 0
+        try:
+            with open(partial_path, "wb") as out:
+                while True:
+                    data = stream.read(CHUNK_SIZE)
+                    if not data:
+                        break
+                    size += len(data)
+                    if size > max_size:
+                        raise ChunkTooLarge(f"Chunks are limited to {max_size} bytes")
+                    out.write(data)
+            os.replace(partial_path, path)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+        return size
+
+    def received(self, upload_id):
+        """Returns ``{index: size}`` for the chunks stored so far."""
+        try:
+            names = os.listdir(self.path(upload_id))
+        except FileNotFoundError:
+            return {}
+        chunks = {}
+        for name in names:
+            index, _, suffix = name.partition(".")
+            if suffix == "part" and index.isdigit():
+                chunks[int(index)] = os.path.getsize(os.path.join(self.path(upload_id), name))
+        return chunks
+
+    def open_chunks(self, upload_id, count):
+        """Returns one stream reading chunks ``0..count-1`` in order."""
+        return ConcatenatedReader([self.chunk_path(upload_id, index) for index in range(count)])
+
+    def discard(self, upload_id):
+        shutil.rmtree(self.path(upload_id), ignore_errors=True)
+
+    def sweep(self, keep_ids, max_age=UPLOAD_TTL):
+        """Removes chunk directories not in ``keep_ids`` untouched for ``max_age``.
+
+        Returns the number of bytes freed.
+        """
+        cutoff = time.time() - max_age.total_seconds()
+        freed = 0
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if not entry.is_dir() or entry.name in keep_ids or not UPLOAD_ID_PATTERN.match(entry.name):
+                    continue
+                if entry.stat().st_mtime > cutoff:
+                    continue
+                freed += sum(self.received(entry.name).values())
+                self.discard(entry.name)
+        return freed
+
+
+class ConcatenatedReader:
+    """Reads a list of files back to back as one binary stream."""
+
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self.current = None
+
+    def read(self, size=-1):
+        while True:
+            if self.current is None:
+                if not self.paths:
+                    return b""
+                self.current = open(self.paths.pop(0), "rb")
+            data = self.current.read(size)
+            if data:
+                return data
+            self.current.close()
+            self.current = None
+
+    def close(self):
+        if self.current is not None:
+            self.current.close()
+            self.current = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def upload_expiry():
+    return utcnow() + UPLOAD_TTL
+
+
+def sweep_voice_uploads(chunks):
+    """Drops expired uploads and chunk directories nobody owns any more.
+
+    Returns the number of chunk bytes freed.
+    """
+    expired = [upload_id for (upload_id,) in db_session.query(VoiceUpload.id).filter(
+        VoiceUpload.expires_at < utcnow()
+    )]
+    freed = 0
+    for upload_id in expired:
+        freed += sum(chunks.received(upload_id).values())
+        chunks.discard(upload_id)
+    if expired:
+        db_session.query(VoiceUpload).filter(VoiceUpload.id.in_(expired)).delete(synchronize_session=False)
+        db_session.commit()
+
+    active = {upload_id for (upload_id,) in db_session.query(VoiceUpload.id)}
+    return freed + chunks.sweep(active)
@@ -0,0 +1,70 @@
+from .base import AudioStorage, HashingReader, CHUNK_SIZE, check_key
+
+
+class S3AudioStorage(AudioStorage):
+    """Stores recordings in an S3-compatible bucket (AWS S3, R2, MinIO, ...).
+
+    Requires boto3, which is only imported when this backend is configured.
+    Downloads are served through presigned URLs so the bucket handles Range
+    requests directly.
+    """
+
+    def __init__(self, bucket, prefix="", endpoint_url=None, region_name=None):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+        except ImportError:
+            raise RuntimeError("S3 audio storage requires boto3: pip install boto3")
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region_name)
+        # Multipart uploads keep at most a few parts in memory
+        self.transfer_config = TransferConfig(multipart_chunksize=8 * 1024 * 1024, io_chunksize=CHUNK_SIZE)
+
+    def object_key(self, key):
+        return self.prefix + check_key(key)
+
+    def save(self, stream, key):
+        reader = HashingReader(stream)
+        self.client.upload_fileobj(reader, self.bucket, self.object_key(key), Config=self.transfer_config)
+        return reader.size, reader.hexdigest()
+
+    def open(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=self.object_key(key))["Body"]
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+
+    def move(self, source_key, target_key):
+        # Managed copy switches to multipart copies for large objects
+        self.client.copy(
+            {"Bucket": self.bucket, "Key": self.object_key(source_key)},
+            self.bucket, self.object_key(target_key), Config=self.transfer_config
+        )
+        self.delete(source_key)
+
+    def exists(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def iter_keys(self):
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for item in page.get("Contents", []):
+                key = item["Key"][len(self.prefix):]
+                if key and "/" not in key:
+                    yield key, item["Size"], item["LastModified"].timestamp()
+
+    def url(self, key, expires_in=3600):
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self.object_key(key)},
+            ExpiresIn=expires_in
+        )
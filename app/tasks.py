@@ -0,0 +1,183 @@
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from flask import current_app
+from sqlalchemy import update
+from app.database.db import db_session
+from app.database.timezones import utcnow
+from app.database.models import Entry, AudioBlob, AudioTranscode
+from app.database.versions import bump_data_version
+from app.audio import compute_peaks, transcode_to_opus, WebmProbe
+from app.storage import get_audio_storage
+from app.storage.blobs import store_audio, discard_audio, release_audio
+
+# Post-upload work runs here so it never delays the response
+executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="serenote-tasks")
+
+# CPU-heavy encoding runs in separate processes, created on first use
+process_pool = None
+
+# Re-encoded audio replaces the original only if it is at least this much smaller
+MIN_TRANSCODE_SAVING = 0.1
+
+# Blobs being re-encoded right now; duplicate uploads of one recording share a blob
+transcoding_keys = set()
+transcoding_lock = threading.Lock()
+
+
+def run_in_background(task, *args):
+    """Runs ``task(*args)`` on the background pool inside an app context.
+
+    Returns the Future. Errors are printed rather than raised, since nobody
+    is waiting on the result.
+    """
+    app = current_app._get_current_object()
+
+    def run():
+        with app.app_context():
+            try:
+                return task(*args)
+            except Exception as e:
+                print(f"Background task {task.__name__}{args} failed: {e}")
+
+    return executor.submit(run)
+
+
+def generate_waveform(entry_id):
+    """Computes and stores the waveform peaks of a voice note.
+
+    Recordings shared through deduplication reuse the peaks already stored
+    for the same audio instead of decoding it again. Storing them bumps the
+    user's data version so cached listings pick the waveform up.
+    """
+    entry = db_session.query(Entry).filter_by(id=entry_id).first()
+    if not entry or not entry.audio_path or entry.waveform:
+        return
+
+    waveform = db_session.query(Entry.waveform).filter(
+        Entry.audio_sha256 == entry.audio_sha256, Entry.waveform.isnot(None)
+    ).limit(1).scalar() if entry.audio_sha256 else None
+
+    if waveform is None:
+        storage = get_audio_storage()
+        key = os.path.basename(entry.audio_path)
+        ffmpeg = current_app.config["FFMPEG_BINARY"]
+        # Don't hold a database connection while decoding
+        db_session.rollback()
+        path = storage.local_path(key)
+        if path is not None:
+            waveform = compute_peaks(path, ffmpeg)
+        else:
+            with storage.open(key) as source:
+                waveform = compute_peaks(source, ffmpeg)
+        if waveform is None:
+            print(f"Waveform: could not decode entry {entry_id} (is ffmpeg installed?)")
+            return
+
+    entry.waveform = waveform
+    entry.version = bump_data_version(entry.user_id)
+    db_session.commit()
+
+
+def get_process_pool():
+    global process_pool
+    if process_pool is None:
+        process_pool = ProcessPoolExecutor(max_workers=current_app.config["AUDIO_TRANSCODE_WORKERS"])
+    return process_pool
+
+
+def transcode_voice_note(entry_id, queued_at):
+    """Re-encodes a voice note to the target Opus bitrate and swaps it in.
+
+    The encode runs in the process pool. The smaller file is stored as a new
+    blob and every entry using the old blob is moved to it in one
+    transaction; the old blob is left unreferenced for garbage collection.
+    Each run is recorded in audio_transcodes with its byte counts and the
+    time it spent queued.
+    """
+    entry = db_session.query(Entry).filter_by(id=entry_id).first()
+    blob = db_session.query(AudioBlob).filter_by(key=entry.audio_path).first() if entry else None
+    if blob is None or blob.transcoded:
+        return
+
+    job = AudioTranscode(
+        entry_id=entry_id, source_key=blob.key, status="failed", bytes_before=blob.size,
+        queued_at=queued_at, started_at=utcnow()
+    )
+    source_key, source_size = blob.key, blob.size
+    storage = get_audio_storage()
+    config = current_app.config
+    # Don't hold a database connection while encoding
+    db_session.rollback()
+
+    with transcoding_lock:
+        if source_key in transcoding_keys:
+            return
+        transcoding_keys.add(source_key)
+
+    queued = (job.started_at - queued_at).total_seconds()
+    workdir = tempfile.mkdtemp(prefix="serenote-transcode-")
+    try:
+        source_path = storage.local_path(source_key)
+        if source_path is None:
+            source_path = os.path.join(workdir, "source")
+            with storage.open(source_key) as source, open(source_path, "wb") as out:
+                shutil.copyfileobj(source, out)
+        target_path = os.path.join(workdir, "target.webm")
+        target_size = get_process_pool().submit(
+            transcode_to_opus, source_path, target_path,
+            config["AUDIO_TRANSCODE_BITRATE"], config["FFMPEG_BINARY"]
+        ).result()
+
+        if target_size is None:
+            print(f"Transcode: could not encode entry {entry_id} (is ffmpeg installed?)")
+        elif target_size > source_size * (1 - MIN_TRANSCODE_SAVING):
+            job.status = "skipped"
+            db_session.execute(update(AudioBlob).where(AudioBlob.key == source_key).values(transcoded=True))
+        else:
+            job.status = "done"
+            job.target_key, job.bytes_after = swap_transcoded_audio(storage, source_key, target_path)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        job.finished_at = utcnow()
+        db_session.add(job)
+        db_session.commit()
+        with transcoding_lock:
+            transcoding_keys.discard(source_key)
+
+    saved = source_size - (job.bytes_after or source_size)
+    print(f"Transcode: entry {entry_id} {job.status}, saved {saved} bytes, queued {queued:.1f}s")
+
+
+def swap_transcoded_audio(storage, source_key, target_path):
+    """Points every entry using ``source_key`` at the encoded file.
+
+    Returns the new blob's ``(key, size)``.
+    """
+    probe = WebmProbe()
+    with open(target_path, "rb") as target:
+        key, size, sha256, created = store_audio(storage, probe.reader(target), ".webm")
+    metadata = probe.metadata()
+
+    try:
+        entries = db_session.query(Entry).filter(Entry.audio_path == source_key).all()
+        for entry in entries:
+            entry.audio_path = key
+            entry.audio_size = size
+            entry.audio_sha256 = sha256
+            entry.audio_codec = metadata["codec"]
+            entry.audio_sample_rate = metadata["sample_rate"]
+            entry.version = bump_data_version(entry.user_id)
+            release_audio(source_key)
+        # store_audio took one reference; each moved entry needs its own
+        db_session.execute(update(AudioBlob).where(AudioBlob.key == key).values(
+            ref_count=AudioBlob.ref_count + len(entries) - 1, transcoded=True,
+            released_at=None if entries else utcnow()
+        ))
+        db_session.flush()
+    except Exception:
+        discard_audio(storage, key, created)
+        raise
+    return key, size
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark: N single POST /entries/add requests vs one POST /entries/bulk.
+
+Runs against a throwaway SQLite database through Flask's test client, so the
+numbers measure server-side cost (validation, inserts, commits) without
+network latency. The app runs in TESTING mode, so a bulk POST that looks
+like an N+1 to the query instrumentation fails the run.
+
+Usage: python bench_bulk_entries.py [N]
+"""
+import os
+import re
+import sys
+import tempfile
+import time
+
+# Point the app at a scratch database before importing it
+db_file = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{db_file}"
+
+from app import create_app
+
+
+def make_entries(n):
+    return [{"title": f"Entry {i}", "content": "Benchmark entry " * 20, "mood": "Calm"} for i in range(n)]
+
+
+def run_benchmark(n):
+    app = create_app()
+    app.config["TESTING"] = True
+    client = app.test_client()
+
+    client.post("/auth/register", json={"username": "bench", "password": "bench"})
+    user_id = client.post("/auth/login", json={"username": "bench", "password": "bench"}).json["userId"]
+    entries = make_entries(n)
+
+    start = time.perf_counter()
+    for entry in entries:
+        client.post("/entries/add", json={"user_id": user_id, **entry})
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    response = client.post("/entries/bulk", json={"user_id": user_id, "entries": entries})
+    bulk = time.perf_counter() - start
+    assert response.json["created"] == n, response.json
+    queries = int(re.search(r'desc="(\d+) queries"', response.headers["Server-Timing"]).group(1))
+    assert queries < 10, f"bulk POST ran {queries} statements"
+
+    print(f"Entries:            {n}")
+    print(f"{n} single POSTs:   {single * 1000:.1f} ms ({single / n * 1000:.2f} ms/entry)")
+    print(f"1 bulk POST:        {bulk * 1000:.1f} ms ({bulk / n * 1000:.2f} ms/entry, {queries} statements)")
+    print(f"Speedup:            {single / bulk:.1f}x")
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Garbage-collects stored audio.
+
+Voice notes are stored once per distinct recording (content-addressed blobs
+with a reference count). Deleting an entry only drops a reference; this
+script deletes blobs that have had no references for the grace period.
+
+--adopt-legacy first moves recordings saved before deduplication (one file
+per entry, e.g. voice_3_1759407289.97.webm) into the blob store, so
+duplicates among them collapse into a single object.
+
+Expired resumable uploads and their chunks are swept as well.
+
+--reconcile then walks the audio storage and checks every object against
+the database in batches. Objects nothing refers to (crashed uploads, files
+of rows deleted long ago) are quarantined, or deleted with --delete-orphans;
+quarantined objects are deleted after --quarantine-days.
+
+Meant to run on a schedule, e.g. nightly from cron:
+    0 3 * * * cd /path/to/serenote && python gc_audio.py --reconcile
+
+Usage: python gc_audio.py [--grace-hours N] [--dry-run] [--adopt-legacy [--batch-size N]]
+                          [--reconcile [--delete-orphans] [--min-age-hours N] [--quarantine-days N]]
+"""
+import argparse
+import os
+from datetime import timedelta
+
+from app import create_app
+from app.database.db import db_session
+from app.database.models import Entry, AudioBlob
+from app.storage import get_audio_storage, get_chunk_store
+from app.storage.resumable import sweep_voice_uploads
+from app.storage.blobs import store_audio, collect_garbage
+from app.storage.reconcile import reconcile_storage, purge_quarantine
+
+
+def adopt_legacy(batch_size):
+    storage = get_audio_storage()
+    adopted = skipped = 0
+    last_id = 0
+
+    while True:
+        entries = db_session.query(Entry).filter(
+            Entry.id > last_id,
+            Entry.audio_path.isnot(None),
+            ~Entry.audio_path.in_(db_session.query(AudioBlob.key))
+        ).order_by(Entry.id).limit(batch_size).all()
+        if not entries:
+            break
+
+        legacy_keys = []
+        for entry in entries:
+            last_id = entry.id
+            legacy_key = os.path.basename(entry.audio_path)
+            if not storage.exists(legacy_key):
+                skipped += 1
+                continue
+            extension = os.path.splitext(legacy_key)[1].lower() or ".webm"
+            with storage.open(legacy_key) as source:
+                key, size, sha256, _ = store_audio(storage, source, extension)
+            entry.audio_path = key
+            entry.audio_size = size
+            entry.audio_sha256 = sha256
+            legacy_keys.append(legacy_key)
+
+        # Only drop the old files once the entries point at their blobs
+        db_session.commit()
+        for legacy_key in legacy_keys:
+            storage.delete(legacy_key)
+        adopted += len(legacy_keys)
+        print(f"Adopted {adopted} legacy recordings ({skipped} missing files skipped)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--grace-hours", type=float, default=24, help="keep unreferenced blobs this long (default 24)")
+    parser.add_argument("--dry-run", action="store_true", help="report what would be deleted")
+    parser.add_argument("--adopt-legacy", action="store_true", help="move per-entry recordings into the blob store first")
+    parser.add_argument("--batch-size", type=int, default=50, help="entries per transaction when adopting (default 50)")
+    parser.add_argument("--reconcile", action="store_true", help="find stored objects nothing refers to")
+    parser.add_argument("--delete-orphans", action="store_true", help="delete orphans instead of quarantining them")
+    parser.add_argument("--min-age-hours", type=float, default=1, help="ignore objects newer than this (default 1)")
+    parser.add_argument("--quarantine-days", type=float, default=7, help="delete quarantined objects after this (default 7)")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.adopt_legacy and not args.dry_run:
+            adopt_legacy(args.batch_size)
+        blobs, reclaimed = collect_garbage(
+            get_audio_storage(), grace_period=timedelta(hours=args.grace_hours), dry_run=args.dry_run
+        )
+        action = "Would delete" if args.dry_run else "Deleted"
+        print(f"{action} {blobs} unreferenced blobs ({reclaimed / 1024 / 1024:.1f} MiB)")
+        total = reclaimed
+        if not args.dry_run:
+            freed = sweep_voice_uploads(get_chunk_store())
+            total += freed
+            print(f"Swept expired uploads ({freed / 1024 / 1024:.1f} MiB of chunks)")
+
+        if args.reconcile:
+            storage = get_audio_storage()
+            stats = reconcile_storage(
+                storage, min_age=timedelta(hours=args.min_age_hours),
+                delete=args.delete_orphans, dry_run=args.dry_run
+            )
+            if args.dry_run:
+                action = "Would remove"
+            else:
+                action = "Deleted" if args.delete_orphans else "Quarantined"
+            print(f"Scanned {stats['scanned']} objects; {action.lower()} {stats['orphans']} orphans "
+                  f"({stats['orphan_bytes'] / 1024 / 1024:.1f} MiB)")
+            if args.delete_orphans:
+                total += stats["orphan_bytes"]
+
+            purged, purged_bytes = purge_quarantine(storage, timedelta(days=args.quarantine_days), args.dry_run)
+            total += purged_bytes
+            print(f"{'Would purge' if args.dry_run else 'Purged'} {purged} quarantined objects "
+                  f"({purged_bytes / 1024 / 1024:.1f} MiB)")
+
+        print(f"Total {'reclaimable' if args.dry_run else 'reclaimed'}: {total / 1024 / 1024:.1f} MiB")
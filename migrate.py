@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Applies database schema migrations (app/database/migrations).
+
+Usage:
+    python migrate.py           apply pending migrations
+    python migrate.py status    list applied and pending migrations
+
+Uses DATABASE_URL like the app. Safe to re-run: every step checks the live
+schema first. On Postgres, indexes are built with CREATE INDEX CONCURRENTLY
+so tables stay writable during the upgrade.
+"""
+import sys
+
+from app.database.db import engine, init_db
+from app.database import migrations
+
+
+def status():
+    pending = {version for version, _ in migrations.pending_migrations(engine)}
+    for version, name, _ in migrations.load_migrations():
+        state = "pending" if version in pending else "applied"
+        print(f"{version:04d}_{name}: {state}")
+
+
+def upgrade():
+    init_db(warn_pending=False)
+    applied = migrations.upgrade(engine)
+    print(f"Applied {len(applied)} migration(s)" if applied else "Database is up to date")
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+    if command == "status":
+        status()
+    elif command == "upgrade":
+        upgrade()
+    else:
+        print(__doc__)
+        sys.exit(1)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Moves legacy Entry.audio_data BLOBs out of the entries table and into the
+configured audio storage (AUDIO_STORAGE=local|s3).
+
+The migration is resumable: every batch commits on its own, and migrated
+rows no longer match the query, so an interrupted run can simply be started
+again. Recordings are stored by content hash, so identical BLOBs end up as
+one shared object; objects left behind by a batch that failed before its
+commit are picked up again by hash on the next run.
+
+Usage: python migrate_audio_blobs.py [--batch-size N] [--limit N] [--vacuum]
+"""
+import argparse
+import io
+from sqlalchemy import text
+from sqlalchemy.orm import load_only
+
+from app import create_app
+from app.database.db import db_session, engine
+from app.database.models import Entry
+from app.storage import get_audio_storage
+from app.storage.blobs import store_audio
+
+
+def migrate(batch_size, limit=None):
+    storage = get_audio_storage()
+    migrated = 0
+    moved_bytes = 0
+
+    while limit is None or migrated < limit:
+        size = batch_size if limit is None else min(batch_size, limit - migrated)
+        ids = [entry_id for (entry_id,) in db_session.query(Entry.id).filter(
+            Entry.audio_data.isnot(None)
+        ).order_by(Entry.id).limit(size)]
+        if not ids:
+            break
+
+        # Load one BLOB at a time so memory stays at a single recording
+        for entry_id in ids:
+            entry = db_session.query(Entry).options(
+                load_only(Entry.id, Entry.user_id, Entry.audio_data)
+            ).filter_by(id=entry_id).one()
+            key, audio_size, audio_sha256, _ = store_audio(storage, io.BytesIO(entry.audio_data), ".webm")
+            entry.audio_path = key
+            entry.audio_size = audio_size
+            entry.audio_sha256 = audio_sha256
+            entry.audio_data = None
+            db_session.flush()
+            db_session.expunge(entry)
+            moved_bytes += audio_size
+
+        db_session.commit()
+        migrated += len(ids)
+        print(f"Migrated {migrated} recordings ({moved_bytes / 1024 / 1024:.1f} MiB)")
+
+    remaining = db_session.query(Entry.id).filter(Entry.audio_data.isnot(None)).count()
+    print(f"Done: {migrated} migrated this run, {remaining} BLOBs remaining")
+    return migrated
+
+
+def vacuum():
+    """Gives the freed BLOB pages back (SQLite) or marks them reusable (Postgres)."""
+    db_session.remove()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if engine.url.get_backend_name() == "sqlite":
+            conn.execute(text("VACUUM"))
+        else:
+            conn.execute(text("VACUUM ANALYZE entries"))
+    print("Vacuum complete")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=50, help="rows per transaction (default 50)")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many rows")
+    parser.add_argument("--vacuum", action="store_true", help="reclaim space once done")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        migrate(args.batch_size, args.limit)
+        if args.vacuum:
+            vacuum()
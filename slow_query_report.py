@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Summarises the slow-query log.
+
+Statements slower than SLOW_QUERY_MS are written to SLOW_QUERY_LOG (one JSON
+object per line, rotated to .1, .2, ...). This groups them by normalized
+SQL, so the same query with different parameters counts as one, and lists
+the groups by total time with the routes that ran them and their plan.
+
+Usage: python slow_query_report.py [--log PATH] [--top N] [--plans]
+"""
+import argparse
+import glob
+import json
+import os
+import tempfile
+
+
+def read_log(path):
+    """Yields log records from ``path`` and its rotated files, oldest first."""
+    rotated = sorted(glob.glob(f"{glob.escape(path)}.[0-9]*"), key=lambda name: -int(name.rsplit(".", 1)[1]))
+    for name in rotated + [path]:
+        if not os.path.exists(name):
+            continue
+        with open(name) as log:
+            for line in log:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def summarise(records):
+    groups = {}
+    for record in records:
+        group = groups.setdefault(record["sql"], {
+            "sql": record["sql"], "count": 0, "total_ms": 0.0, "durations": [],
+            "routes": {}, "params": record.get("params"), "plan": None
+        })
+        group["count"] += 1
+        group["total_ms"] += record["duration_ms"]
+        group["durations"].append(record["duration_ms"])
+        group["routes"][record["route"]] = group["routes"].get(record["route"], 0) + 1
+        if record.get("plan"):
+            group["plan"] = record["plan"]
+    for group in groups.values():
+        durations = sorted(group.pop("durations"))
+        group["mean_ms"] = group["total_ms"] / group["count"]
+        group["p95_ms"] = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+        group["max_ms"] = durations[-1]
+    return sorted(groups.values(), key=lambda group: group["total_ms"], reverse=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    default_log = os.path.join(tempfile.gettempdir(), "serenote-slow-queries.log")
+    parser.add_argument("--log", default=os.environ.get("SLOW_QUERY_LOG", default_log),
+                        help=f"slow-query log (default $SLOW_QUERY_LOG or {default_log})")
+    parser.add_argument("--top", type=int, default=20, help="number of statements to show (default 20)")
+    parser.add_argument("--plans", action="store_true", help="print the captured plan of each statement")
+    args = parser.parse_args()
+
+    groups = summarise(read_log(args.log))
+    if not groups:
+        print(f"No slow queries logged in {args.log}")
+    for rank, group in enumerate(groups[:args.top], 1):
+        routes = ", ".join(f"{route} ({count})" for route, count in
+                           sorted(group["routes"].items(), key=lambda item: -item[1]))
+        print(f"#{rank}  {group['count']}x  total {group['total_ms']:.0f} ms  mean {group['mean_ms']:.1f} ms  "
+              f"p95 {group['p95_ms']:.1f} ms  max {group['max_ms']:.1f} ms")
+        print(f"    {group['sql'][:500]}")
+        print(f"    params: {json.dumps(group['params'])}")
+        print(f"    routes: {routes}")
+        if args.plans and group["plan"]:
+            for line in group["plan"]:
+                print(f"      | {line}")
+        print()